@@ -0,0 +1,131 @@
+# adaptive_detection.py
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class AdaptiveDetection:
+    # Decides which frames HandDetector runs inference on and what it feeds it.
+    # Once a hand is found, input is cropped to its last landmark bounding box
+    # (plus roi_margin of the box size on each side, at least roi_min of the
+    # frame) and downscaled to at most max_width pixels wide. Inference runs at
+    # active_fps while the hand moves, static_fps once it has held still for
+    # static_after inferences, and absent_fps with no hand in view. None turns a
+    # knob off (active_fps=None: no rate limit at all), so
+    # AdaptiveDetection(None, None, None) runs full frames on every frame.
+    def __init__(self, max_width=320, roi_margin=0.3, active_fps=15, static_fps=5, absent_fps=3,
+                 static_threshold=0.01, static_after=5, roi_min=0.3, rate_window=2.0):
+        self.max_width = max_width
+        self.roi_margin = roi_margin
+        self.active_fps = active_fps
+        self.static_fps = static_fps
+        self.absent_fps = absent_fps
+        self.static_threshold = static_threshold  # mean landmark motion per inference, in frame widths
+        self.static_after = static_after
+        self.roi_min = roi_min
+        self.rate_window = rate_window  # seconds of history for inferences_per_sec
+
+        self.bbox = None  # (x0, y0, x1, y1) of the last landmarks, normalized to the full frame
+        self.prev_landmarks = None
+        self.static_count = 0
+        self.next_time = 0.0
+
+        self.frames = 0
+        self.inferences = 0
+        self.roi_inferences = 0
+        self.reacquired = 0  # hand lost inside the ROI, so the next frame searches the full frame
+        self.total_latency = 0.0
+        self.inference_times = deque()
+
+    @property
+    def interval(self):
+        # Seconds until the next inference is due
+        if self.active_fps is None:
+            return 0.0
+        if self.bbox is None:
+            fps = self.absent_fps
+        elif self.static_count >= self.static_after:
+            fps = self.static_fps
+        else:
+            fps = self.active_fps
+        return 1.0 / fps if fps else 0.0
+
+    def should_infer(self, now):
+        self.frames += 1
+        return now >= self.next_time
+
+    def prepare(self, frame):
+        # Returns (image to run inference on, (x0, y0, w, h) crop of `frame` it covers)
+        h, w = frame.shape[:2]
+        x0, y0, cw, ch = 0, 0, w, h
+        if self.roi_margin is not None and self.bbox is not None:
+            bx0, by0, bx1, by1 = self.bbox
+            margin = self.roi_margin * max(bx1 - bx0, by1 - by0)
+            half_w = max((bx1 - bx0) / 2 + margin, self.roi_min / 2)
+            half_h = max((by1 - by0) / 2 + margin, self.roi_min / 2)
+            cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+            x0, x1 = int(max(cx - half_w, 0.0) * w), int(np.ceil(min(cx + half_w, 1.0) * w))
+            y0, y1 = int(max(cy - half_h, 0.0) * h), int(np.ceil(min(cy + half_h, 1.0) * h))
+            cw, ch = x1 - x0, y1 - y0
+        image = frame[y0:y0 + ch, x0:x0 + cw]
+        if self.max_width is not None and cw > self.max_width:
+            size = (self.max_width, max(1, round(ch * self.max_width / cw)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return image, (x0, y0, cw, ch)
+
+    def to_frame(self, landmarks, roi, frame_shape):
+        # Landmarks normalized to the crop -> normalized to the full frame (read-only, like the input)
+        x0, y0, cw, ch = roi
+        h, w = frame_shape[:2]
+        if len(landmarks) == 0 or (x0, y0, cw, ch) == (0, 0, w, h):
+            return landmarks
+        out = landmarks.copy()
+        out[..., 0] = (x0 + landmarks[..., 0] * cw) / w
+        out[..., 1] = (y0 + landmarks[..., 1] * ch) / h
+        out.setflags(write=False)
+        return out
+
+    def observe(self, landmarks, roi, frame_shape, captured_at, now=None):
+        # Updates tracking and rate state after one inference on the prepared image
+        now = time.perf_counter() if now is None else now
+        self.inferences += 1
+        self.total_latency += now - captured_at
+        self.inference_times.append(now)
+        while self.inference_times[0] < now - self.rate_window:
+            self.inference_times.popleft()
+        cropped = roi != (0, 0, frame_shape[1], frame_shape[0])
+        self.roi_inferences += cropped
+
+        if len(landmarks) == 0:
+            self.bbox = None
+            self.prev_landmarks = None
+            self.static_count = 0
+            if cropped:
+                self.reacquired += 1
+                self.next_time = now  # look at the whole next frame at once
+                return
+        else:
+            xy = landmarks[..., :2]
+            self.bbox = (*xy.reshape(-1, 2).min(axis=0).tolist(), *xy.reshape(-1, 2).max(axis=0).tolist())
+            prev = self.prev_landmarks
+            if prev is not None and prev.shape == landmarks.shape:
+                motion = float(np.abs(xy - prev[..., :2]).mean())
+                self.static_count = self.static_count + 1 if motion < self.static_threshold else 0
+            else:
+                self.static_count = 0
+            self.prev_landmarks = landmarks
+        self.next_time = captured_at + self.interval
+
+    def stats(self):
+        times = self.inference_times
+        span = times[-1] - times[0] if len(times) > 1 else 0.0
+        return {
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "roi_inferences": self.roi_inferences,
+            "reacquired": self.reacquired,
+            "inferences_per_sec": round((len(times) - 1) / span, 2) if span else 0.0,
+            "avg_latency_ms": round(self.total_latency / self.inferences * 1000, 3) if self.inferences else None,
+        }
@@ -0,0 +1,100 @@
+# assets.py
+import os
+import time
+
+import pygame
+
+from .sprite_loader import SpriteSheet
+
+
+class AssetManager:
+    # Loads every image once, packs them into one atlas surface (each asset is a
+    # subsurface of it) and memoizes scaled variants by (asset, size), so
+    # nothing is loaded, converted or scaled in the frame loop.
+    def __init__(self, root="assets", atlas_width=512, padding=1):
+        self.root = root
+        self.atlas_width = atlas_width
+        self.padding = padding
+        self.atlas = None
+        self.images = {}  # name -> atlas subsurface
+        self.sheets = {}  # (name, frame_width, frame_height) -> SpriteSheet
+        self.variants = {}  # (name or Surface, size) -> scaled Surface
+        self.load_ms = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, manifest):
+        # manifest: {name: filename under root}. Can only be called once the display mode is set.
+        start = time.perf_counter()
+        loaded = {name: pygame.image.load(os.path.join(self.root, filename)).convert_alpha()
+                  for name, filename in manifest.items()}
+        self.images.update(self.pack(loaded))
+        self.load_ms += (time.perf_counter() - start) * 1000
+        return self
+
+    def pack(self, images):
+        # Shelf packing, tallest first; returns {name: subsurface of the new atlas}
+        pad = self.padding
+        order = sorted(images, key=lambda name: images[name].get_height(), reverse=True)
+        width = max([self.atlas_width] + [images[name].get_width() + pad for name in order])
+        placements = {}
+        x = y = shelf_height = 0
+        for name in order:
+            w, h = images[name].get_size()
+            if x + w > width:
+                x, y = 0, y + shelf_height + pad
+                shelf_height = 0
+            placements[name] = pygame.Rect(x, y, w, h)
+            x += w + pad
+            shelf_height = max(shelf_height, h)
+
+        # Earlier atlases stay alive through their subsurfaces; a new load packs a new one
+        self.atlas = pygame.Surface((width, max(y + shelf_height, 1)), pygame.SRCALPHA).convert_alpha()
+        self.atlas.fill((0, 0, 0, 0))
+        for name, rect in placements.items():
+            self.atlas.blit(images[name], rect)
+        return {name: self.atlas.subsurface(rect) for name, rect in placements.items()}
+
+    def get(self, name, size=None):
+        # The atlas image, or a memoized copy scaled to `size`
+        if size is None:
+            return self.images[name]
+        return self.scale(name, size)
+
+    def scale(self, image, size):
+        # `image` is an asset name or any Surface; Surfaces are cached by identity
+        size = (int(size[0]), int(size[1]))
+        key = (image, size)
+        variant = self.variants.get(key)
+        if variant is not None:
+            self.hits += 1
+            return variant
+        self.misses += 1
+        source = self.images[image] if isinstance(image, str) else image
+        variant = source if source.get_size() == size else pygame.transform.scale(source, size)
+        self.variants[key] = variant
+        return variant
+
+    def sprite_sheet(self, name, frame_width, frame_height):
+        key = (name, frame_width, frame_height)
+        sheet = self.sheets.get(key)
+        if sheet is None:
+            sheet = SpriteSheet(None, frame_width, frame_height, sheet=self.images[name])
+            self.sheets[key] = sheet
+        return sheet
+
+    def stats(self):
+        def surface_bytes(surf):
+            return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+        return {
+            "load_ms": round(self.load_ms, 3),
+            "images": len(self.images),
+            "atlas_size": self.atlas.get_size() if self.atlas is not None else (0, 0),
+            "atlas_bytes": surface_bytes(self.atlas) if self.atlas is not None else 0,
+            "variants": len(self.variants),
+            # Unscaled variants are the atlas image itself and cost nothing extra
+            "variant_bytes": sum(surface_bytes(s) for s in self.variants.values() if s.get_parent() is None),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
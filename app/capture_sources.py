@@ -0,0 +1,169 @@
+# capture_sources.py
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+class FrameSource:
+    # Base class for anything HandDetector can read frames from. read() mirrors
+    # cv2.VideoCapture.read() but paces itself to target_fps and sleeps with
+    # exponential backoff after a failed read instead of returning immediately.
+    def __init__(self, target_fps=None, backoff=0.01, max_backoff=1.0):
+        self.target_fps = target_fps
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.frames_read = 0
+        self.next_frame_time = None
+
+    @property
+    def finished(self):
+        # True once the source can never produce another frame (e.g. end of file)
+        return False
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _pace(self):
+        if not self.target_fps:
+            return
+        now = time.perf_counter()
+        if self.next_frame_time is None:
+            self.next_frame_time = now
+        delay = self.next_frame_time - now
+        if delay > 0:
+            time.sleep(delay)
+        # Don't try to catch up after a stall; just schedule from now
+        self.next_frame_time = max(self.next_frame_time, now) + 1.0 / self.target_fps
+
+    def read(self):
+        self._pace()
+        ok, frame = self._read()
+        if ok:
+            self.failures = 0
+            self.frames_read += 1
+            return True, frame
+
+        self.failures += 1
+        if not self.finished:
+            time.sleep(min(self.backoff * 2 ** (self.failures - 1), self.max_backoff))
+        return False, None
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    def __init__(self, index=1, target_fps=None, **kwargs):
+        super().__init__(target_fps, **kwargs)
+        self.index = index
+        self.cap = cv2.VideoCapture(index)
+
+    def _read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    # Replays a recorded video such as hand_capture.mp4. target_fps=None reads
+    # as fast as the consumer asks; 'native' paces at the file's own frame rate.
+    def __init__(self, path, target_fps=None, loop=False, **kwargs):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Could not open video: {path}")
+        if target_fps == 'native':
+            target_fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+        super().__init__(target_fps, **kwargs)
+        self.ended = False
+
+    @property
+    def finished(self):
+        return self.ended
+
+    def _read(self):
+        if self.ended:
+            return False, None
+        ok, frame = self.cap.read()
+        if not ok and self.loop and self.frames_read:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        if not ok:
+            self.ended = True
+        return ok, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource(FrameSource):
+    # Reads a sorted list of image files, given as a list, a directory or a glob pattern
+    def __init__(self, paths, target_fps=None, loop=False, **kwargs):
+        super().__init__(target_fps, **kwargs)
+        if isinstance(paths, str):
+            pattern = os.path.join(paths, "*") if os.path.isdir(paths) else paths
+            paths = [p for p in glob.glob(pattern) if not os.path.isdir(p)]
+        self.paths = sorted(paths)
+        self.loop = loop
+        self.position = 0
+
+    @property
+    def finished(self):
+        return not self.loop and self.position >= len(self.paths)
+
+    def _read(self):
+        if not self.paths or self.finished:
+            return False, None
+        path = self.paths[self.position % len(self.paths)]
+        self.position += 1
+        frame = cv2.imread(path)
+        return frame is not None, frame
+
+
+class SyntheticSource(FrameSource):
+    # Produces generated BGR frames without any hardware. `frame_fn(index)` may
+    # return a frame; by default a blank frame of the given size is returned.
+    def __init__(self, width=640, height=480, target_fps=30, num_frames=None, frame_fn=None, **kwargs):
+        super().__init__(target_fps, **kwargs)
+        self.num_frames = num_frames
+        self.frame_fn = frame_fn
+        self.blank = np.zeros((height, width, 3), dtype=np.uint8)
+
+    @property
+    def finished(self):
+        return self.num_frames is not None and self.frames_read >= self.num_frames
+
+    def _read(self):
+        if self.finished:
+            return False, None
+        if self.frame_fn is not None:
+            return True, self.frame_fn(self.frames_read)
+        return True, self.blank.copy()
+
+
+class NullSource(FrameSource):
+    # Never yields a frame; reads back off up to max_backoff so an idle detector costs ~no CPU
+    def _read(self):
+        return False, None
+
+
+def open_source(spec, target_fps=None, **kwargs):
+    # Builds a source from a CLI-style spec: camera index, video file, image
+    # directory/glob, 'synthetic' or 'null'
+    if spec is None or spec == 'null':
+        return NullSource(target_fps, **kwargs)
+    if spec == 'synthetic':
+        return SyntheticSource(target_fps=target_fps or 30, **kwargs)
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec), target_fps, **kwargs)
+    if spec.lower().endswith(VIDEO_EXTS):
+        return VideoFileSource(spec, target_fps, **kwargs)
+    return ImageSequenceSource(spec, target_fps, **kwargs)
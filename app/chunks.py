@@ -0,0 +1,199 @@
+# chunks.py
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+CHUNK_SIZE = 64
+
+
+class ChunkStore:
+    # A (height, width) 2D array split into square chunks that are created on
+    # first access, either filled with `fill` or by `generator(cx, cy, chunk)`.
+    # At most `max_resident` chunks stay as arrays; the least recently used
+    # ones are zlib-compressed and inflated again when touched. Indexing
+    # supports what the game uses on plain tile arrays: tiles[y, x],
+    # tiles[y0:y1, x0:x1] (returns a copy), tiles[ys, xs] with int arrays, and
+    # slice assignment.
+    def __init__(self, width, height, chunk_size=CHUNK_SIZE, dtype=np.uint8, fill=0, generator=None, max_resident=64):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.dtype = np.dtype(dtype)
+        self.fill = fill
+        self.generator = generator
+        self.max_resident = max_resident
+        self.chunks_wide = -(-width // chunk_size)
+        self.chunks_high = -(-height // chunk_size)
+        self.resident = OrderedDict()  # (cx, cy) -> (chunk_size, chunk_size) array, LRU order
+        self.compressed = {}  # (cx, cy) -> zlib bytes; kept while a resident copy is unmodified
+        self.modified = set()  # resident chunks whose compressed copy is stale
+        self.generated = 0
+        self.inflated = 0
+        self.evicted = 0
+
+    @property
+    def shape(self):
+        return (self.height, self.width)
+
+    def chunk(self, cx, cy):
+        # Resident array for chunk (cx, cy), generating or inflating it if needed
+        key = (cx, cy)
+        arr = self.resident.get(key)
+        if arr is not None:
+            self.resident.move_to_end(key)
+            return arr
+
+        cs = self.chunk_size
+        data = self.compressed.get(key)
+        if data is not None:
+            arr = np.frombuffer(zlib.decompress(data), dtype=self.dtype).reshape(cs, cs).copy()
+            self.inflated += 1
+        else:
+            arr = np.full((cs, cs), self.fill, dtype=self.dtype)
+            if self.generator is not None:
+                self.generator(cx, cy, arr)
+            self.modified.add(key)
+            self.generated += 1
+        self.resident[key] = arr
+        self._evict(self.max_resident)
+        return arr
+
+    def _evict(self, limit):
+        while len(self.resident) > limit:
+            key, arr = self.resident.popitem(last=False)
+            if key in self.modified or key not in self.compressed:
+                self.compressed[key] = zlib.compress(arr.tobytes(), 1)
+                self.modified.discard(key)
+            self.evicted += 1
+
+    def chunks_in(self, x0, y0, x1, y1):
+        # Chunk keys overlapping the tile rect [x0, x1) x [y0, y1), clipped to the map
+        cs = self.chunk_size
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width), min(y1, self.height)
+        if x1 <= x0 or y1 <= y0:
+            return []
+        return [(cx, cy) for cy in range(y0 // cs, (y1 - 1) // cs + 1)
+                for cx in range(x0 // cs, (x1 - 1) // cs + 1)]
+
+    def stream(self, x0, y0, x1, y1):
+        # Load every chunk the tile rect touches and compress everything else
+        # beyond the resident budget; call once per step with the view plus a margin
+        keys = self.chunks_in(x0, y0, x1, y1)
+        for key in keys:
+            self.chunk(*key)
+        self._evict(max(self.max_resident, len(keys)))
+        return keys
+
+    def read(self, x0, y0, x1, y1):
+        # Dense copy of the tile rect, clipped to the map
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width), min(y1, self.height)
+        out = np.empty((max(y1 - y0, 0), max(x1 - x0, 0)), dtype=self.dtype)
+        cs = self.chunk_size
+        for cx, cy in self.chunks_in(x0, y0, x1, y1):
+            arr = self.chunk(cx, cy)
+            bx0, by0 = max(x0, cx * cs), max(y0, cy * cs)
+            bx1, by1 = min(x1, (cx + 1) * cs), min(y1, (cy + 1) * cs)
+            out[by0 - y0:by1 - y0, bx0 - x0:bx1 - x0] = arr[by0 - cy * cs:by1 - cy * cs, bx0 - cx * cs:bx1 - cx * cs]
+        return out
+
+    def write(self, x0, y0, values):
+        # Assign a 2D block (or broadcast a scalar over it) at top-left (x0, y0)
+        values = np.asarray(values, dtype=self.dtype)
+        h, w = values.shape
+        cs = self.chunk_size
+        for cx, cy in self.chunks_in(x0, y0, x0 + w, y0 + h):
+            arr = self.chunk(cx, cy)
+            bx0, by0 = max(x0, cx * cs), max(y0, cy * cs)
+            bx1, by1 = min(x0 + w, (cx + 1) * cs), min(y0 + h, (cy + 1) * cs)
+            arr[by0 - cy * cs:by1 - cy * cs, bx0 - cx * cs:bx1 - cx * cs] = values[by0 - y0:by1 - y0, bx0 - x0:bx1 - x0]
+            self.modified.add((cx, cy))
+
+    def gather(self, ys, xs):
+        # Values at int index arrays (ys, xs), grouped so each chunk is touched once
+        ys = np.asarray(ys, dtype=np.int64)
+        xs = np.asarray(xs, dtype=np.int64)
+        out = np.empty(ys.shape, dtype=self.dtype)
+        if ys.size == 0:
+            return out
+        cs = self.chunk_size
+        keys = (ys // cs) * self.chunks_wide + xs // cs
+        for key in np.unique(keys):
+            sel = keys == key
+            cy, cx = divmod(int(key), self.chunks_wide)
+            out[sel] = self.chunk(cx, cy)[ys[sel] - cy * cs, xs[sel] - cx * cs]
+        return out
+
+    def _slice_bounds(self, key):
+        ys, xs = key
+        y0, y1, ystep = ys.indices(self.height)
+        x0, x1, xstep = xs.indices(self.width)
+        if ystep != 1 or xstep != 1:
+            raise IndexError("ChunkStore slices must have step 1")
+        return x0, y0, x1, y1
+
+    def __getitem__(self, key):
+        ys, xs = key
+        if isinstance(ys, slice) and isinstance(xs, slice):
+            return self.read(*self._slice_bounds(key))
+        if np.ndim(ys) == 0 and np.ndim(xs) == 0:
+            y, x = int(ys), int(xs)
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError(f"tile ({x}, {y}) is outside the {self.width}x{self.height} map")
+            cs = self.chunk_size
+            return self.chunk(x // cs, y // cs)[y % cs, x % cs]
+        return self.gather(ys, xs)
+
+    def __setitem__(self, key, value):
+        ys, xs = key
+        if isinstance(ys, slice) and isinstance(xs, slice):
+            x0, y0, x1, y1 = self._slice_bounds(key)
+            self.write(x0, y0, np.broadcast_to(np.asarray(value, dtype=self.dtype), (max(y1 - y0, 0), max(x1 - x0, 0))))
+        else:
+            y, x = int(ys), int(xs)
+            self.write(x, y, np.full((1, 1), value, dtype=self.dtype))
+
+    def export(self):
+        # Every chunk created so far as {(cx, cy): array copy or zlib bytes}. Cheap
+        # enough for the frame thread; stack_chunks() does the decoding later.
+        chunks = dict(self.compressed)
+        for key, arr in self.resident.items():
+            if key in self.modified or key not in self.compressed:
+                chunks[key] = arr.copy()
+        return chunks
+
+    def stack_chunks(self, chunks):
+        # export() output -> ((K, 2) int32 chunk keys, (K, chunk_size, chunk_size) values)
+        cs = self.chunk_size
+        keys = np.array(list(chunks), dtype=np.int32).reshape(-1, 2)
+        out = np.empty((len(keys), cs, cs), dtype=self.dtype)
+        for i, data in enumerate(chunks.values()):
+            if isinstance(data, bytes):
+                data = np.frombuffer(zlib.decompress(data), dtype=self.dtype).reshape(cs, cs)
+            out[i] = data
+        return keys, out
+
+    def load_chunks(self, keys, values):
+        # Replaces the contents with stacked chunks (see stack_chunks); chunks not
+        # listed are generated or filled on first access as usual
+        self.resident.clear()
+        self.compressed.clear()
+        self.modified.clear()
+        for (cx, cy), arr in zip(keys.tolist(), values):
+            key = (cx, cy)
+            self.resident[key] = np.array(arr, dtype=self.dtype)
+            self.modified.add(key)
+        self._evict(self.max_resident)
+
+    def stats(self):
+        return {
+            "resident": len(self.resident),
+            "compressed": len(self.compressed),
+            "resident_bytes": len(self.resident) * self.chunk_size * self.chunk_size * self.dtype.itemsize,
+            "compressed_bytes": sum(len(data) for data in self.compressed.values()),
+            "generated": self.generated,
+            "inflated": self.inflated,
+            "evicted": self.evicted,
+        }
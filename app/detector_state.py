@@ -0,0 +1,36 @@
+# detector_state.py
+from collections import namedtuple
+
+import numpy as np
+
+# Immutable view of one processed camera frame. `landmarks` is a read-only
+# (num_hands, 21, 3) float32 array of normalized (x, y, z) coordinates and
+# `frame` is the raw BGR capture (not annotated, never written to). `seq` counts
+# inferences: frames skipped by adaptive detection reuse the last seq and landmarks.
+DetectorSnapshot = namedtuple(
+    "DetectorSnapshot", ["seq", "timestamp", "hand_detected", "hand_piece", "landmarks", "frame"]
+)
+
+EMPTY_LANDMARKS = np.zeros((0, 21, 3), dtype=np.float32)
+EMPTY_LANDMARKS.setflags(write=False)
+EMPTY_SNAPSHOT = DetectorSnapshot(0, 0.0, False, False, EMPTY_LANDMARKS, None)
+
+
+def is_peace_sign(hand):
+    # hand is a (21, 3) landmark array; thumb test assumes a right hand
+    def extended(tip_idx, pip_idx):
+        return hand[tip_idx, 1] < hand[pip_idx, 1] - 0.02
+
+    index_extended = extended(8, 6)
+    middle_extended = extended(12, 10)
+    ring_curled = hand[16, 1] > hand[14, 1] + 0.02
+    pinky_curled = hand[20, 1] > hand[18, 1] + 0.02
+    thumb_curled = hand[4, 0] < hand[3, 0]
+
+    return bool(
+        index_extended and
+        middle_extended and
+        ring_curled and
+        pinky_curled and
+        thumb_curled
+    )
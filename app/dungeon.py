@@ -1,34 +1,53 @@
 # dungeon.py
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
+from .chunks import ChunkStore, CHUNK_SIZE
+
 TILE_WALL = 0
 TILE_FLOOR = 1
 
+GENERATOR_VERSION = 1  # bump when generation changes so stale .npz caches are ignored
+
 class Dungeon:
-    def __init__(self, width, height):
+    # Rooms-and-corridors map generated from `seed` with its own np.random.Generator,
+    # so a (seed, size, params) triple always gives the same map. With `cache_dir`
+    # the result is stored as .npz and loaded instead of regenerated next time.
+    # seed=None draws one from np.random, so seeding np.random still fixes the map;
+    # such a seed is different on every unseeded run, so cache_dir is ignored then.
+    def __init__(self, width, height, seed=None, room_attempts=20, min_size=6, max_size=12, cache_dir=None, generate=True):
         self.width = width
         self.height = height
+        self.seed = int(np.random.randint(2**31)) if seed is None else int(seed)
+        if seed is None:
+            cache_dir = None
+        self.params = (room_attempts, min_size, max_size)
         self.tiles = np.full((height, width), TILE_WALL, dtype=np.uint8)
         self.rooms = []
-        self.generate()
+        self.from_cache = False
+        if not generate:
+            return  # the caller fills in tiles and rooms (see snapshot.build_dungeon)
+        if cache_dir is not None and self.load(cache_dir):
+            self.from_cache = True
+            return
+        self.generate(room_attempts, min_size, max_size)
+        if cache_dir is not None:
+            self.save(cache_dir)
 
     def generate(self, room_attempts=20, min_size=6, max_size=12):
-        for _ in range(room_attempts):
-            w = np.random.randint(min_size, max_size + 1)
-            h = np.random.randint(min_size, max_size + 1)
-            x = np.random.randint(1, self.width - w - 1)
-            y = np.random.randint(1, self.height - h - 1)
-            new_room = (x, y, w, h)
-
-            if any(self.intersect(new_room, r) for r in self.rooms):
-                continue
-            self.create_room(new_room)
-            if self.rooms:
-                prev_x, prev_y = self.center(self.rooms[-1])
-                new_x, new_y = self.center(new_room)
-                self.connect_rooms(prev_x, prev_y, new_x, new_y)
-
-            self.rooms.append(new_room)
+        rng = np.random.default_rng(self.seed)
+        rects = place_rooms(rng, self.width, self.height, room_attempts, min_size, max_size)
+        horizontal_first = rng.random(len(rects)) < 0.5
+        for i, room in enumerate(rects):
+            self.create_room(room)
+            if i:
+                prev_x, prev_y = self.center(rects[i - 1])
+                new_x, new_y = self.center(room)
+                carve_tunnel(self.tiles, prev_x, prev_y, new_x, new_y, horizontal_first[i])
+        self.rooms = [tuple(int(v) for v in room) for room in rects]
 
     def create_room(self, room):
         x, y, w, h = room
@@ -38,24 +57,161 @@ class Dungeon:
         x, y, w, h = room
         return x + w // 2, y + h // 2
 
-    def intersect(self, r1, r2):
-        x1, y1, w1, h1 = r1
-        x2, y2, w2, h2 = r2
-        return (x1 <= x2 + w2 and x1 + w1 >= x2 and
-                y1 <= y2 + h2 and y1 + h1 >= y2)
+    def cache_path(self, cache_dir):
+        key = (GENERATOR_VERSION, self.seed, self.width, self.height) + self.params
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+        return os.path.join(cache_dir, f"dungeon_{self.width}x{self.height}_{self.seed}_{digest}.npz")
+
+    def load(self, cache_dir):
+        path = self.cache_path(cache_dir)
+        try:
+            with np.load(path) as data:
+                tiles, rooms = data["tiles"], data["rooms"]
+        except (OSError, KeyError, ValueError):
+            return False
+        if tiles.shape != self.tiles.shape:
+            return False
+        self.tiles = tiles.astype(np.uint8, copy=False)
+        self.rooms = [tuple(int(v) for v in room) for room in rooms]
+        return True
+
+    def save(self, cache_dir):
+        # Written to a temp file and renamed, so parallel batch workers never see a partial cache
+        os.makedirs(cache_dir, exist_ok=True)
+        path = self.cache_path(cache_dir)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, tiles=self.tiles, rooms=np.asarray(self.rooms, dtype=np.int32).reshape(-1, 4))
+        os.replace(tmp, path)
+        return path
+
+
+def place_rooms(rng, width, height, room_attempts, min_size, max_size):
+    # Draws every candidate room at once and keeps, in order, each one that doesn't
+    # touch or overlap an earlier kept room. Returns an (n, 4) int array of (x, y, w, h).
+    ws = rng.integers(min_size, max_size + 1, room_attempts)
+    hs = rng.integers(min_size, max_size + 1, room_attempts)
+    xs = rng.integers(1, width - ws - 1)
+    ys = rng.integers(1, height - hs - 1)
+
+    # Pairwise overlap matrix; touching rooms count as overlapping
+    overlap = ((xs[:, None] <= xs[None, :] + ws[None, :]) & (xs[:, None] + ws[:, None] >= xs[None, :]) &
+               (ys[:, None] <= ys[None, :] + hs[None, :]) & (ys[:, None] + hs[:, None] >= ys[None, :]))
+    accepted = np.zeros(room_attempts, dtype=bool)
+    for i in range(room_attempts):
+        accepted[i] = not np.any(overlap[i, :i] & accepted[:i])
+    return np.stack([xs, ys, ws, hs], axis=1)[accepted]
+
+
+def _generate_one(job):
+    width, height, seed, params, cache_dir = job
+    return Dungeon(width, height, seed, *params, cache_dir=cache_dir)
+
+
+def generate_batch(seeds, width, height, room_attempts=20, min_size=6, max_size=12, cache_dir=None, workers=None):
+    # Generates one dungeon per seed across a process pool (seed order is kept).
+    # With cache_dir, already-cached seeds are just loaded by the workers.
+    params = (room_attempts, min_size, max_size)
+    jobs = [(width, height, int(seed), params, cache_dir) for seed in seeds]
+    if workers == 1 or len(jobs) <= 1:
+        return [_generate_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_generate_one, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))))
+
+
+def carve_tunnel(tiles, x1, y1, x2, y2, horizontal_first):
+    # L-shaped floor corridor between (x1, y1) and (x2, y2), carved with two slice assignments
+    if horizontal_first:
+        tiles[y1, min(x1, x2):max(x1, x2) + 1] = TILE_FLOOR
+        tiles[min(y1, y2):max(y1, y2) + 1, x2] = TILE_FLOOR
+    else:
+        tiles[min(y1, y2):max(y1, y2) + 1, x1] = TILE_FLOOR
+        tiles[y2, min(x1, x2):max(x1, x2) + 1] = TILE_FLOOR
+
+
+class ChunkedDungeon:
+    # Same interface as Dungeon (width, height, tiles, rooms, center) for maps
+    # too large to generate or hold at once. `tiles` is a ChunkStore; each chunk
+    # is generated the first time it is touched from (seed, cx, cy) alone, with
+    # rooms joined to a hub and the hub joined to doors on the chunk edges. A
+    # door's position only depends on the edge, so both neighbours carve to the
+    # same spot and the world stays connected whatever order chunks load in.
+    def __init__(self, width, height, seed=0, chunk_size=CHUNK_SIZE, max_resident=64,
+                 room_attempts=6, min_size=6, max_size=12, generate=True):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.room_attempts = room_attempts
+        self.min_size = min_size
+        self.max_size = max_size
+        self.rooms = []  # rooms of every chunk generated so far, in generation order
+        self.chunk_rooms = {}  # (cx, cy) -> rooms generated in that chunk
+        self.tiles = ChunkStore(width, height, chunk_size, fill=TILE_WALL,
+                                generator=self.generate_chunk, max_resident=max_resident)
+
+        # The chunk in the middle of the map is generated first, so rooms[0] is the start room
+        if generate:
+            self.tiles.chunk(self.tiles.chunks_wide // 2, self.tiles.chunks_high // 2)
+
+    def center(self, room):
+        x, y, w, h = room
+        return x + w // 2, y + h // 2
+
+    def chunk_bounds(self, cx, cy):
+        cs = self.tiles.chunk_size
+        x0, y0 = cx * cs, cy * cs
+        return x0, y0, min(x0 + cs, self.width), min(y0 + cs, self.height)
+
+    def door(self, cx, cy, axis):
+        # Door tile row (axis 0, on the edge shared with chunk cx+1) or column
+        # (axis 1, on the edge shared with chunk cy+1)
+        x0, y0, x1, y1 = self.chunk_bounds(cx, cy)
+        lo, hi = (y0, y1) if axis == 0 else (x0, x1)
+        if hi - lo <= 2:
+            return lo
+        rng = np.random.default_rng([self.seed, cx, cy, axis + 1])
+        return int(rng.integers(lo + 1, hi - 1))
+
+    def generate_chunk(self, cx, cy, chunk):
+        # Fills one ChunkStore array in place (chunk-local coordinates)
+        x0, y0, x1, y1 = self.chunk_bounds(cx, cy)
+        cw, ch = x1 - x0, y1 - y0
+        rng = np.random.default_rng([self.seed, cx, cy])
+
+        rooms = []
+        max_w, max_h = min(self.max_size, cw - 3), min(self.max_size, ch - 3)
+        if max_w >= self.min_size and max_h >= self.min_size:
+            rects = place_rooms(rng, cw, ch, self.room_attempts, self.min_size, min(max_w, max_h))
+            horizontal_first = rng.random(len(rects)) < 0.5
+            for i, (x, y, w, h) in enumerate(rects):
+                chunk[y:y + h, x:x + w] = TILE_FLOOR
+                if i:
+                    px, py = self.center(rects[i - 1])
+                    carve_tunnel(chunk, px, py, x + w // 2, y + h // 2, horizontal_first[i])
+            rooms = [(int(x) + x0, int(y) + y0, int(w), int(h)) for x, y, w, h in rects]
 
-    def connect_rooms(self, x1, y1, x2, y2):
-        if np.random.random() < 0.5:
-            self.create_h_tunnel(x1, x2, y1)
-            self.create_v_tunnel(y1, y2, x2)
+        # Hub: first room's center, or the chunk center for slivers on the map edge
+        if rooms:
+            hx, hy = self.center(rooms[0])
         else:
-            self.create_v_tunnel(y1, y2, x1)
-            self.create_h_tunnel(x1, x2, y2)
+            hx, hy = x0 + cw // 2, y0 + ch // 2
+            chunk[hy - y0, hx - x0] = TILE_FLOOR
+        hx, hy = hx - x0, hy - y0
 
-    def create_h_tunnel(self, x1, x2, y):
-        for x in range(min(x1, x2), max(x1, x2) + 1):
-            self.tiles[y, x] = TILE_FLOOR
+        # Corridors from the hub to the door on each edge that has a neighbour
+        doors = []
+        if cx + 1 < self.tiles.chunks_wide:
+            doors.append((cw - 1, self.door(cx, cy, 0) - y0))
+        if cx > 0:
+            doors.append((0, self.door(cx - 1, cy, 0) - y0))
+        if cy + 1 < self.tiles.chunks_high:
+            doors.append((self.door(cx, cy, 1) - x0, ch - 1))
+        if cy > 0:
+            doors.append((self.door(cx, cy - 1, 1) - x0, 0))
+        for dx, dy in doors:
+            # Finish along the door's row/column so corridors never run along the chunk border
+            horizontal_first = dx not in (0, cw - 1)
+            carve_tunnel(chunk, hx, hy, dx, dy, horizontal_first)
 
-    def create_v_tunnel(self, y1, y2, x):
-        for y in range(min(y1, y2), max(y1, y2) + 1):
-            self.tiles[y, x] = TILE_FLOOR
\ No newline at end of file
+        self.chunk_rooms[(cx, cy)] = rooms
+        self.rooms.extend(rooms)
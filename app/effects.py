@@ -1,84 +1,184 @@
-# effects.py
+import numpy as np
 import pygame
 
 COLOR_TREE = (0, 255, 0)
 COLOR_LOOT = (255, 255, 0)
 COLOR_ENEMY = (255, 0, 0)
-COLOR_FLASH = (255, 100, 100)
-COLOR_FADE = (100, 0, 0)
+COLOR_GHOST = (200, 200, 255)
 
-flash_duration = 10
 sparkle_duration = 10
 death_fade_duration = 20
 
-flash_counters = {}
-sparkle_counters = {}
-death_counters = {}
+# Effect kinds
+EFFECT_SHRINK = 0  # tree chop
+EFFECT_SPARKLE = 1  # loot pickup burst
 
-def draw_object_effect(screen, obj, camera, tile_size):
-    pos_key = tuple(obj.pos)
+FREE = -1
+PARTICLE_OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int32)
+
+
+class EffectsEngine:
+    # Timed effects and particles in preallocated NumPy pools. Effects are keyed
+    # by stable entity id and store the tile they play on, so moving or
+    # overlapping entities never share state, and nothing is left behind once
+    # an effect ends. update() advances everything in one vectorized step;
+    # draw() culls to the camera and draws in one pass. Both pools have a fixed
+    # size: start() and emit() drop work (and count it) when they are full.
+    def __init__(self, max_effects=256, max_particles=1024):
+        self.entity = np.full(max_effects, FREE, dtype=np.int64)
+        self.kind = np.zeros(max_effects, dtype=np.uint8)
+        self.pos = np.zeros((max_effects, 2), dtype=np.int32)
+        self.remaining = np.zeros(max_effects, dtype=np.int16)
+        self.duration = np.ones(max_effects, dtype=np.int16)
+        self.slot_of = {}  # entity id -> effect slot
+
+        self.p_pos = np.zeros((max_particles, 2), dtype=np.float32)  # tile units
+        self.p_vel = np.zeros((max_particles, 2), dtype=np.float32)
+        self.p_life = np.zeros(max_particles, dtype=np.int16)  # steps left; 0 = free
+        self.p_color = np.zeros((max_particles, 3), dtype=np.uint8)
+
+        self.dropped_effects = 0
+        self.dropped_particles = 0
+
+    def start(self, eid, kind, pos, duration):
+        # Starts (or restarts) entity `eid`'s effect. Returns False if the pool is full.
+        slot = self.slot_of.get(eid)
+        if slot is None:
+            free = np.flatnonzero(self.entity == FREE)
+            if free.size == 0:
+                self.dropped_effects += 1
+                return False
+            slot = int(free[0])
+            self.slot_of[eid] = slot
+        self.entity[slot] = eid
+        self.kind[slot] = kind
+        self.pos[slot] = (int(pos[0]), int(pos[1]))
+        self.remaining[slot] = duration
+        self.duration[slot] = duration
+        return True
+
+    def is_active(self, eid, kind=None):
+        slot = self.slot_of.get(eid)
+        return slot is not None and (kind is None or self.kind[slot] == kind)
+
+    def active_ids(self):
+        return list(self.slot_of)
+
+    def cancel(self, eid):
+        slot = self.slot_of.pop(eid, None)
+        if slot is not None:
+            self.entity[slot] = FREE
+
+    def emit(self, pos, count, speed, life, color):
+        # Ring of `count` particles from the centre of tile `pos`, moving `speed` tiles per step
+        free = np.flatnonzero(self.p_life == 0)[:count]
+        self.dropped_particles += count - free.size
+        if free.size == 0:
+            return
+        angles = np.linspace(0.0, 2 * np.pi, count, endpoint=False)[:free.size]
+        self.p_pos[free] = (pos[0] + 0.5, pos[1] + 0.5)
+        self.p_vel[free, 0] = np.cos(angles) * speed
+        self.p_vel[free, 1] = np.sin(angles) * speed
+        self.p_life[free] = life
+        self.p_color[free] = color
+
+    def update(self):
+        # One simulation step for every effect and particle
+        active = self.entity != FREE
+        self.remaining[active] -= 1
+        for slot in np.flatnonzero(active & (self.remaining <= 0)):
+            del self.slot_of[int(self.entity[slot])]
+            self.entity[slot] = FREE
+
+        alive = self.p_life > 0
+        self.p_pos[alive] += self.p_vel[alive]
+        self.p_life[alive] -= 1
+
+    def draw(self, screen, camera, tile_size, offset=(0, 0)):
+        x0, y0 = camera.x, camera.y
+        x1, y1 = x0 + camera.tiles_wide, y0 + camera.tiles_high
+
+        pos = self.pos
+        visible = np.flatnonzero((self.entity != FREE) & (pos[:, 0] >= x0) & (pos[:, 0] < x1) &
+                                 (pos[:, 1] >= y0) & (pos[:, 1] < y1))
+        centers = (pos[visible] - (x0, y0)) * tile_size + np.asarray(offset) + tile_size // 2
+        for slot, center in zip(visible, centers.tolist()):
+            kind = self.kind[slot]
+            remaining, duration = int(self.remaining[slot]), int(self.duration[slot])
+            fade = remaining / duration
+            if kind == EFFECT_SHRINK:
+                pygame.draw.circle(screen, COLOR_TREE, center, int((tile_size // 3) * fade))
+            elif kind == EFFECT_SPARKLE:
+                # The ring starts one step out and grows 2px per step
+                burst_radius = int((tile_size // 4) + 2 * (duration - remaining + 1))
+                pygame.draw.circle(screen, COLOR_LOOT, center, burst_radius, 2)
+
+        alive = np.flatnonzero(self.p_life > 0)
+        if alive.size:
+            self._draw_particles(screen, alive, (x0, y0), tile_size, offset)
+
+    def _draw_particles(self, screen, alive, origin, tile_size, offset):
+        # Every on-screen particle is a 3x3 square; all of them are written into the
+        # screen pixels in one vectorized assignment, clipped to the screen's clip
+        # rect (later slots overwrite earlier ones where squares overlap)
+        screen_pos = ((self.p_pos[alive] - origin) * tile_size + np.asarray(offset)).astype(np.int32)
+        w, h = screen.get_size()
+        on_screen = ((screen_pos[:, 0] >= 0) & (screen_pos[:, 0] < w) &
+                     (screen_pos[:, 1] >= 0) & (screen_pos[:, 1] < h))
+        alive, screen_pos = alive[on_screen], screen_pos[on_screen]
+        clip = screen.get_clip()
+        xs = (screen_pos[:, 0, np.newaxis] + PARTICLE_OFFSETS[:, 0]).ravel()
+        ys = (screen_pos[:, 1, np.newaxis] + PARTICLE_OFFSETS[:, 1]).ravel()
+        inside = (xs >= clip.left) & (xs < clip.right) & (ys >= clip.top) & (ys < clip.bottom)
+        if not inside.any():
+            return
+        colors = np.repeat(self.p_color[alive], len(PARTICLE_OFFSETS), axis=0)
+        pixels = pygame.surfarray.pixels3d(screen)  # (w, h, 3) view, no copy
+        pixels[xs[inside], ys[inside]] = colors[inside]
+        del pixels  # unlock the screen
+
+    def screen_rects(self, camera, tile_size, offset=(0, 0)):
+        # Screen rects covering what draw() would draw right now, for dirty-rect rendering:
+        # one square per effect (sized for the largest sparkle ring) and one box around all particles
+        rects = []
+        x0, y0 = camera.x, camera.y
+        active = np.flatnonzero(self.entity != FREE)
+        if active.size:
+            reach = tile_size // 4 + 2 * int(self.duration[active].max()) + 4
+            centers = (self.pos[active] - (x0, y0)) * tile_size + np.asarray(offset) + tile_size // 2
+            rects.extend(pygame.Rect(cx - reach, cy - reach, 2 * reach, 2 * reach) for cx, cy in centers.tolist())
+        alive = np.flatnonzero(self.p_life > 0)
+        if alive.size:
+            screen_pos = (self.p_pos[alive] - (x0, y0)) * tile_size + np.asarray(offset)
+            (lx, ly), (hx, hy) = screen_pos.min(axis=0), screen_pos.max(axis=0)
+            rects.append(pygame.Rect(int(lx) - 2, int(ly) - 2, int(hx - lx) + 5, int(hy - ly) + 5))
+        return rects
+
+    def stats(self):
+        return {
+            "effects": len(self.slot_of),
+            "effect_capacity": len(self.entity),
+            "particles": int(np.count_nonzero(self.p_life)),
+            "particle_capacity": len(self.p_life),
+            "dropped_effects": self.dropped_effects,
+            "dropped_particles": self.dropped_particles,
+            "bytes": sum(a.nbytes for a in (self.entity, self.kind, self.pos, self.remaining, self.duration,
+                                            self.p_pos, self.p_vel, self.p_life, self.p_color)),
+        }
+
+
+def draw_object_marker(screen, obj, camera, tile_size, now_ms=None, offset=(0, 0)):
+    # Idle look of an object that has no effect playing: tree dot, blinking loot
     sx, sy = camera.to_screen(*obj.pos)
-    center = (sx + tile_size // 2, sy + tile_size // 2)
-
-    # Enemy flash + death dissolve
-    if obj.type == 'enemy_projectile':
-        if obj.health > 0:
-            if pos_key not in flash_counters:
-                flash_counters[pos_key] = flash_duration
-            else:
-                flash_counters[pos_key] = max(0, flash_counters[pos_key] - 1)
-
-            if flash_counters[pos_key] > 0:
-                pygame.draw.circle(screen, COLOR_FLASH, center, tile_size // 3)
-            else:
-                pygame.draw.circle(screen, COLOR_ENEMY, center, tile_size // 3)
-        else:
-            if pos_key not in death_counters:
-                death_counters[pos_key] = death_fade_duration
-            else:
-                death_counters[pos_key] -= 1
-
-            fade = max(0, death_counters[pos_key]) / death_fade_duration
-            faded_color = tuple(int(c * fade) for c in COLOR_FADE)
-            pygame.draw.circle(screen, faded_color, center, int((tile_size // 3) * fade))
-
-            if death_counters[pos_key] <= 0:
-                death_counters.pop(pos_key, None)
-                flash_counters.pop(pos_key, None)
-
-    # Tree chop animation (shrink)
-    elif obj.type == 'tree':
+    center = (sx + offset[0] + tile_size // 2, sy + offset[1] + tile_size // 2)
+
+    if obj.type == 'tree':
         if not obj.collected:
             pygame.draw.circle(screen, COLOR_TREE, center, tile_size // 3)
-        else:
-            if pos_key not in death_counters:
-                death_counters[pos_key] = death_fade_duration
-            else:
-                death_counters[pos_key] -= 1
-
-            fade = max(0, death_counters[pos_key]) / death_fade_duration
-            pygame.draw.circle(screen, COLOR_TREE, center, int((tile_size // 3) * fade))
-
-            if death_counters[pos_key] <= 0:
-                death_counters.pop(pos_key, None)
 
-    # Loot sparkle + pickup burst
     elif obj.type == 'loot':
         if not obj.collected:
-            frame = pygame.time.get_ticks() // 200 % 2
+            ticks = pygame.time.get_ticks() if now_ms is None else now_ms
+            frame = ticks // 200 % 2
             radius = tile_size // 4 + (1 if frame == 0 else 0)
             pygame.draw.circle(screen, COLOR_LOOT, center, radius)
-        else:
-            if pos_key not in sparkle_counters:
-                sparkle_counters[pos_key] = sparkle_duration
-
-            if sparkle_counters[pos_key] > 0:
-                sparkle_counters[pos_key] -= 1
-                burst_radius = int((tile_size // 4) + 2 * (sparkle_duration - sparkle_counters[pos_key]))
-                pygame.draw.circle(screen, COLOR_LOOT, center, burst_radius, 2)
-            else:
-                sparkle_counters.pop(pos_key, None)
-
-    # Clean flash state for removed objects
-    if obj.health <= 0 or obj.collected:
-        flash_counters.pop(pos_key, None)
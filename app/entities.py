@@ -0,0 +1,257 @@
+# entities.py
+import numpy as np
+
+TYPE_GHOST = 0
+TYPE_TREE = 1
+TYPE_LOOT = 2
+TYPE_WOOD = 3
+TYPE_NAMES = ('ghost', 'tree', 'loot', 'wood')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+MAX_HEALTH = 500
+GHOST_MOVE_DELAY = 10  # Higher = slower ghost movement
+GHOST_CHASE_RANGE = 6
+BOW_RANGE = 5
+BOW_DAMAGE = 15
+AXE_RANGE = 2
+AXE_DAMAGE = 25
+LOOT_RANGE = 2
+WOOD_RANGE = 1
+GHOST_HIT_RANGE = 1.5
+GHOST_DAMAGE = 5
+
+# Per-slot arrays of EntityStore, in snapshot order
+COLUMNS = ('ids', 'pos', 'prev_pos', 'health', 'type', 'move_timer', 'alive', 'collected',
+           'added_to_inventory', 'dropped')
+
+
+class EntityStore:
+    # Struct-of-arrays storage for every object in the level. Each slot is one
+    # entity; `ids` holds a stable id that is never reused, so effects and the
+    # spatial index can key on it safely.
+    def __init__(self, capacity=64):
+        self.capacity = 0
+        self.count = 0  # slots in use are [0, count); dead slots are recycled via free_slots
+        self.next_id = 0
+        self.free_slots = []
+        self.slot_of = {}  # entity id -> slot
+        self.views = {}  # entity id -> Entity
+
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.pos = np.zeros((0, 2), dtype=np.int32)
+        self.prev_pos = np.zeros((0, 2), dtype=np.int32)  # position before the last update, for render interpolation
+        self.health = np.zeros(0, dtype=np.int32)
+        self.type = np.zeros(0, dtype=np.uint8)
+        self.move_timer = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.collected = np.zeros(0, dtype=bool)
+        self.added_to_inventory = np.zeros(0, dtype=bool)
+        self.dropped = np.zeros(0, dtype=bool)
+        self._grow(capacity)
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def _grow(self, capacity):
+        def grown(arr):
+            out = np.zeros((capacity,) + arr.shape[1:], dtype=arr.dtype)
+            out[:len(arr)] = arr
+            return out
+
+        self.ids = grown(self.ids)
+        self.pos = grown(self.pos)
+        self.prev_pos = grown(self.prev_pos)
+        self.health = grown(self.health)
+        self.type = grown(self.type)
+        self.move_timer = grown(self.move_timer)
+        self.alive = grown(self.alive)
+        self.collected = grown(self.collected)
+        self.added_to_inventory = grown(self.added_to_inventory)
+        self.dropped = grown(self.dropped)
+        self.capacity = capacity
+
+    def spawn(self, pos, obj_type):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow(max(2 * self.capacity, 16))
+            slot = self.count
+            self.count += 1
+
+        eid = self.next_id
+        self.next_id += 1
+        self.ids[slot] = eid
+        self.pos[slot] = (int(pos[0]), int(pos[1]))
+        self.prev_pos[slot] = self.pos[slot]
+        self.health[slot] = MAX_HEALTH
+        self.type[slot] = TYPE_CODES[obj_type]
+        self.move_timer[slot] = 0
+        self.alive[slot] = True
+        self.collected[slot] = False
+        self.added_to_inventory[slot] = False
+        self.dropped[slot] = False
+        self.slot_of[eid] = slot
+        return eid
+
+    def despawn(self, eid):
+        slot = self.slot_of.pop(eid, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self.views.pop(eid, None)
+        self.free_slots.append(slot)
+
+    def view(self, eid):
+        entity = self.views.get(eid)
+        if entity is None:
+            entity = Entity(self, eid)
+            self.views[eid] = entity
+        return entity
+
+    def all_views(self):
+        return [self.view(eid) for eid in self.slot_of]
+
+    def columns(self):
+        # Copies of every per-slot column up to `count`, dead slots included, so a
+        # restored store keeps the same slot layout (and update order)
+        n = self.count
+        return {name: getattr(self, name)[:n].copy() for name in COLUMNS}
+
+    def load_columns(self, columns, next_id, free_slots=()):
+        n = len(columns["ids"])
+        self.capacity = 0
+        for name in COLUMNS:
+            setattr(self, name, np.zeros((0,) + getattr(self, name).shape[1:], dtype=getattr(self, name).dtype))
+        self._grow(max(n, 64))
+        for name in COLUMNS:
+            getattr(self, name)[:n] = columns[name]
+        self.count = n
+        self.next_id = int(next_id)
+        self.free_slots = [int(slot) for slot in free_slots]
+        self.views = {}
+        self.slot_of = {int(self.ids[slot]): int(slot) for slot in np.flatnonzero(self.alive[:n])}
+
+    def update(self, player_pos, tool, tiles, floor_value, player=None, flow=None):
+        # One vectorized interaction step for every live entity. Returns
+        # (ids of ghosts that moved, ids whose health dropped this step).
+        # With a FlowField, chasing ghosts path around walls instead of
+        # stepping straight at the player.
+        n = self.count
+        alive = self.alive[:n]
+        pos = self.pos[:n]
+        types = self.type[:n]
+        health = self.health[:n]
+        player_pos = np.asarray(player_pos, dtype=np.int32)
+        self.prev_pos[:n] = pos
+
+        delta = player_pos - pos
+        distance = np.sqrt(np.sum(delta * delta, axis=1, dtype=np.float64))
+        prev_health = health.copy()
+
+        # Ghost chase: every ghost's timer ticks, in-range ghosts step when it expires
+        ghosts = alive & (types == TYPE_GHOST)
+        self.move_timer[:n][ghosts] += 1
+        movers = ghosts & (distance < GHOST_CHASE_RANGE) & (self.move_timer[:n] >= GHOST_MOVE_DELAY)
+        moved_ids = np.zeros(0, dtype=np.int64)
+        if movers.any():
+            idx = np.flatnonzero(movers)
+            if flow is not None:
+                flow.update(tiles, player_pos, floor_value)
+                new_pos = flow.next_steps(pos[idx], player_pos)
+                walkable = np.any(new_pos != pos[idx], axis=1)
+            else:
+                new_pos = pos[idx] + np.clip(delta[idx], -1, 1)
+                height, width = tiles.shape
+                in_bounds = ((new_pos[:, 0] >= 0) & (new_pos[:, 0] < width) &
+                             (new_pos[:, 1] >= 0) & (new_pos[:, 1] < height))
+                walkable = np.zeros(len(idx), dtype=bool)
+                inside = new_pos[in_bounds]
+                walkable[in_bounds] = tiles[inside[:, 1], inside[:, 0]] == floor_value
+            pos[idx[walkable]] = new_pos[walkable]
+            moved_ids = self.ids[idx[walkable]]
+
+            # Damage the player for every ghost that ends up too close
+            close = np.sum((player_pos - pos[idx]) ** 2, axis=1) <= GHOST_HIT_RANGE ** 2
+            hits = int(np.count_nonzero(close))
+            if hits and player:
+                player["health"] = max(0, player["health"] - GHOST_DAMAGE * hits)
+                player["screen_shake"] = 5  # trigger screen shake when hit
+
+            self.move_timer[:n][idx] = 0
+
+        # Bow uses the distance from before the ghost moved, like a per-object interact did
+        if tool == 'bow':
+            health[ghosts & (distance < BOW_RANGE)] -= BOW_DAMAGE
+
+        trees = alive & (types == TYPE_TREE) & (distance < AXE_RANGE)
+        if tool == 'axe':
+            health[trees] -= AXE_DAMAGE
+            self.collected[:n] |= trees & (health <= 0)
+
+        self.collected[:n] |= alive & (types == TYPE_LOOT) & (distance < LOOT_RANGE)
+        self.collected[:n] |= alive & (types == TYPE_WOOD) & (distance <= WOOD_RANGE)
+
+        hit_ids = self.ids[:n][alive & (health < prev_health)]
+        return moved_ids, hit_ids
+
+    def finished_ids(self):
+        # Entities that need lifecycle handling: collected items/trees and dead ghosts
+        n = self.count
+        alive = self.alive[:n]
+        dead_ghosts = (self.type[:n] == TYPE_GHOST) & (self.health[:n] <= 0)
+        return self.ids[:n][alive & (self.collected[:n] | dead_ghosts)]
+
+
+class Entity:
+    # Lightweight view of one EntityStore row with the per-object interface
+    # inventory, effects and the spatial index use.
+    __slots__ = ('store', 'id')
+
+    def __init__(self, store, eid):
+        self.store = store
+        self.id = eid
+
+    @property
+    def slot(self):
+        return self.store.slot_of[self.id]
+
+    @property
+    def pos(self):
+        return self.store.pos[self.slot]
+
+    def lerp_pos(self, alpha):
+        # Position interpolated between the previous and current update
+        slot = self.slot
+        prev, cur = self.store.prev_pos[slot], self.store.pos[slot]
+        return prev + (cur - prev) * alpha
+
+    @property
+    def type(self):
+        return TYPE_NAMES[self.store.type[self.slot]]
+
+    @property
+    def health(self):
+        return int(self.store.health[self.slot])
+
+    @property
+    def collected(self):
+        return bool(self.store.collected[self.slot])
+
+    @property
+    def dropped(self):
+        return bool(self.store.dropped[self.slot])
+
+    @dropped.setter
+    def dropped(self, value):
+        self.store.dropped[self.slot] = value
+
+    def is_collectable(self):
+        slot = self.slot
+        return bool(self.store.collected[slot] and not self.store.added_to_inventory[slot])
+
+    def mark_as_added_to_inventory(self):
+        self.store.added_to_inventory[self.slot] = True
+
+    def get_icon_key(self):
+        return self.type if self.type in {"loot", "wood"} else None
@@ -0,0 +1,89 @@
+# flow_field.py
+import numpy as np
+
+UNREACHED = np.iinfo(np.int32).max
+
+# Neighbour offsets (dx, dy), 8-connected like the ghosts' old straight-line step
+_NEIGHBOURS = np.array([(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy], dtype=np.int32)
+
+
+class FlowField:
+    # Breadth-first step distances to the player's tile over walkable tiles,
+    # shared by every ghost. It covers a (2r+1, 2r+1) window around the player,
+    # so the cost doesn't grow with the map, and is rebuilt only when the
+    # player changes tile or invalidate() is called after tiles change.
+    def __init__(self, radius=16):
+        self.radius = radius
+        self.origin = None  # player tile the field was built from
+        self.x0 = 0
+        self.y0 = 0
+        self.dist = np.full((1, 1), UNREACHED, dtype=np.int32)
+        self.rebuilds = 0
+
+    def invalidate(self):
+        self.origin = None
+
+    def update(self, tiles, player_tile, floor_value):
+        # Returns True if the field was rebuilt
+        origin = (int(player_tile[0]), int(player_tile[1]))
+        if origin == self.origin:
+            return False
+
+        r = self.radius
+        height, width = tiles.shape
+        x0, y0 = origin[0] - r, origin[1] - r
+        size = 2 * r + 1
+        walkable = np.zeros((size, size), dtype=bool)
+        sx0, sy0 = max(x0, 0), max(y0, 0)
+        sx1, sy1 = min(x0 + size, width), min(y0 + size, height)
+        walkable[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0] = tiles[sy0:sy1, sx0:sx1] == floor_value
+
+        # Wavefront BFS: each ring is the 8-neighbour dilation of the last one
+        dist = np.full((size, size), UNREACHED, dtype=np.int32)
+        frontier = np.zeros((size, size), dtype=bool)
+        frontier[r, r] = True
+        dist[r, r] = 0
+        step = 0
+        while frontier.any():
+            step += 1
+            grown = frontier.copy()
+            grown[1:, :] |= frontier[:-1, :]
+            grown[:-1, :] |= frontier[1:, :]
+            grown[:, 1:] |= grown[:, :-1].copy()
+            grown[:, :-1] |= grown[:, 1:].copy()
+            frontier = grown & walkable & (dist == UNREACHED)
+            dist[frontier] = step
+
+        self.origin = origin
+        self.x0, self.y0 = x0, y0
+        self.dist = dist
+        self.rebuilds += 1
+        return True
+
+    def lookup(self, pos):
+        # Step distance for each (x, y) in pos; UNREACHED outside the window
+        pos = np.asarray(pos, dtype=np.int32).reshape(-1, 2)
+        lx, ly = pos[:, 0] - self.x0, pos[:, 1] - self.y0
+        size = self.dist.shape[0]
+        inside = (lx >= 0) & (lx < size) & (ly >= 0) & (ly < size)
+        out = np.full(len(pos), UNREACHED, dtype=np.int32)
+        out[inside] = self.dist[ly[inside], lx[inside]]
+        return out
+
+    def next_steps(self, pos, target):
+        # One step downhill for each position in `pos`. The straight step towards
+        # `target` wins ties so open-room chasing looks the same as before; a
+        # position with no closer neighbour stays put.
+        pos = np.asarray(pos, dtype=np.int32).reshape(-1, 2)
+        direct = np.clip(np.asarray(target, dtype=np.int32) - pos, -1, 1)
+        steps = np.concatenate([direct[:, None, :], np.broadcast_to(_NEIGHBOURS, (len(pos), 8, 2))], axis=1)
+        candidates = pos[:, None, :] + steps  # (n, 9, 2)
+        cost = self.lookup(candidates.reshape(-1, 2)).reshape(len(pos), 9)
+        cost[(direct == 0).all(axis=1), 0] = UNREACHED  # standing still is not a step
+        best = np.argmin(cost, axis=1)  # first minimum, so the direct step wins ties
+        rows = np.arange(len(pos))
+        current = self.lookup(pos)
+        moves = cost[rows, best] < current
+        out = pos.copy()
+        out[moves] = candidates[rows[moves], best[moves]]
+        return out
@@ -0,0 +1,117 @@
+# fov.py
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from .dungeon import TILE_WALL
+
+# Visibility for the (2r+1, 2r+1) window whose top-left map tile is (x0, y0).
+# `visible` is bool; Lighting turns it into per-pixel occlusion.
+FovResult = namedtuple("FovResult", ["x0", "y0", "visible"])
+
+# Octant transforms (xx, xy, yx, yy) for recursive shadowcasting
+_OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+
+def _cast_light(opaque, visible, cx, cy, row, start, end, radius, xx, xy, yx, yy):
+    # Scans one octant row by row, recursing around opaque tiles
+    if start < end:
+        return
+    radius_sq = radius * radius
+    size = opaque.shape[0]
+    new_start = start
+    for j in range(row, radius + 1):
+        dx, dy = -j - 1, -j
+        blocked = False
+        while dx <= 0:
+            dx += 1
+            l_slope = (dx - 0.5) / (dy + 0.5)
+            r_slope = (dx + 0.5) / (dy - 0.5)
+            if start < r_slope:
+                continue
+            if end > l_slope:
+                break
+
+            x = cx + dx * xx + dy * xy
+            y = cy + dx * yx + dy * yy
+            if not (0 <= x < size and 0 <= y < size):
+                continue
+            if dx * dx + dy * dy <= radius_sq:
+                visible[y, x] = True
+
+            if blocked:
+                if opaque[y, x]:
+                    new_start = r_slope
+                else:
+                    blocked = False
+                    start = new_start
+            elif opaque[y, x] and j < radius:
+                blocked = True
+                _cast_light(opaque, visible, cx, cy, j + 1, start, l_slope, radius, xx, xy, yx, yy)
+                new_start = r_slope
+        if blocked:
+            break
+
+
+def compute_fov(tiles, origin, radius):
+    # Recursive shadowcasting from `origin` (x, y) over a (h, w) tile array.
+    # Walls block sight but are themselves visible; off-map tiles are opaque.
+    radius = max(int(radius), 0)
+    ox, oy = int(origin[0]), int(origin[1])
+    size = 2 * radius + 1
+    x0, y0 = ox - radius, oy - radius
+
+    # Pad the window with walls so off-map tiles behave as opaque
+    opaque = np.ones((size, size), dtype=bool)
+    h, w = tiles.shape
+    sx0, sy0 = max(x0, 0), max(y0, 0)
+    sx1, sy1 = min(x0 + size, w), min(y0 + size, h)
+    if sx1 > sx0 and sy1 > sy0:
+        opaque[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0] = tiles[sy0:sy1, sx0:sx1] == TILE_WALL
+
+    visible = np.zeros((size, size), dtype=bool)
+    visible[radius, radius] = True
+    for xx, xy, yx, yy in _OCTANTS:
+        _cast_light(opaque, visible, radius, radius, 1, 1.0, 0.0, radius, xx, xy, yx, yy)
+
+    # Clip tiles that fall outside the map
+    visible[:max(sy0 - y0, 0), :] = False
+    visible[:, :max(sx0 - x0, 0)] = False
+    visible[max(sy1 - y0, 0):, :] = False
+    visible[:, max(sx1 - x0, 0):] = False
+
+    # Results are shared through the cache, so keep them immutable
+    visible.setflags(write=False)
+    return FovResult(x0, y0, visible)
+
+
+class FieldOfView:
+    # LRU cache of FOV results keyed by (player tile, radius). Call invalidate()
+    # whenever dungeon tiles change.
+    def __init__(self, dungeon, cache_size=128):
+        self.dungeon = dungeon
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compute(self, player_tile, radius):
+        key = (int(player_tile[0]), int(player_tile[1]), int(radius))
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = compute_fov(self.dungeon.tiles, key[:2], key[2])
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def invalidate(self):
+        self.cache.clear()
@@ -0,0 +1,562 @@
+# game.py
+import numpy as np
+import pygame
+
+from .dungeon import Dungeon, ChunkedDungeon
+from .camera import Camera
+from .dungeon import TILE_WALL, TILE_FLOOR
+from .entities import EntityStore
+from .minimap import FogOfWar
+from .effects import (EffectsEngine, draw_object_marker, EFFECT_SHRINK, EFFECT_SPARKLE,
+                      death_fade_duration, sparkle_duration, COLOR_LOOT, COLOR_GHOST)
+from .assets import AssetManager
+from .inventory import Inventory
+from .tool_display import ToolDisplay
+from .hud import Hud
+from .tile_renderer import TileRenderer, COLOR_WALL, COLOR_FLOOR
+from .fov import FieldOfView
+from .spatial_index import SpatialHash
+from .flow_field import FlowField
+from .lighting import Lighting
+from .text_cache import TextCache
+from .recorder import VideoRecorder, POLICY_DROP
+from .profiler import FrameProfiler
+from .snapshot import build_dungeon, restore
+
+
+# --- Constants ---
+SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
+TILE_SIZE = 24
+MAP_WIDTH, MAP_HEIGHT = 60, 45
+SIM_FPS = 15  # gameplay tuning (ghost delay, effect lengths, flicker) assumes this step rate
+SIM_DT = 1.0 / SIM_FPS
+LIGHT_RADIUS = 7  # in tiles
+DENSE_MAP_LIMIT = 256  # maps wider or taller than this are generated and streamed chunk by chunk
+
+# Image files under assets/, loaded once into the AssetManager atlas
+ASSETS = {
+    "player": "player_ready.png",
+    "tree": "tree_idle_ready.png",
+    "coin": "coin_ready.png",
+    "wood": "wood_ready.png",
+    "axe": "axe_24.png",
+    "bow": "bow_ready.png",
+    "lantern": "lantern_ready.png",
+    "ghost": "ghost_ready.png",
+}
+
+# --- Colors ---
+COLOR_PLAYER = (0, 0, 255)
+
+
+def merge_rects(rects, bounds):
+    # Unions overlapping rects until none overlap, clipped to `bounds`
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if rect.w == 0 or rect.h == 0:
+            continue
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class Game:
+    # All game state. update(dt) advances the simulation by one fixed step and
+    # render(alpha) draws the state interpolated between the last two steps, so
+    # the render rate no longer changes gameplay speed. With a `snapshot` (see
+    # snapshot.load_snapshot) the saved run is resumed instead of generating a new one.
+    def __init__(self, screen, hand_detector, profiler=None, text_cache=None, record_policy=POLICY_DROP,
+                 map_size=(MAP_WIDTH, MAP_HEIGHT), dungeon_cache=None, dirty_rects=False, snapshot=None,
+                 replay_log=None):
+        self.screen = screen
+        self.hand_detector = hand_detector
+        self.profiler = profiler or FrameProfiler()
+        self.always_profile = self.profiler.enabled  # --profile keeps spans on when the overlay is hidden
+        self.text_cache = text_cache or TextCache()
+
+        # Load every image once into one atlas; scaled variants are memoized
+        self.assets = AssetManager().load(ASSETS)
+        self.player_sprite_sheet = self.assets.sprite_sheet("player", 24, 24)
+        self.tree_sprite_sheet = self.assets.sprite_sheet("tree", 24, 24)
+        self.coin_icon = self.assets.get("coin")
+        self.wood_icon = self.assets.get("wood")
+        self.axe_icon = self.assets.get("axe")
+        self.bow_icon = self.assets.get("bow")
+        self.lantern_icon = self.assets.get("lantern", (TILE_SIZE, TILE_SIZE))
+        self.ghost_icon = self.assets.get("ghost")
+        self.item_icons = {"loot": self.coin_icon, "wood": self.wood_icon}  # inventory icon per pickup type
+
+        # Initialize player
+        self.player_status = {"health": 100, "screen_shake": 0}
+
+        # Initialize dungeon
+        if snapshot is not None:
+            map_size = tuple(snapshot["meta"]["map_size"])
+        self.map_width, self.map_height = map_size
+        self.chunked = max(map_size) > DENSE_MAP_LIMIT
+        if snapshot is not None:
+            self.dungeon = build_dungeon(snapshot)
+        elif self.chunked:
+            self.dungeon = ChunkedDungeon(self.map_width, self.map_height, seed=np.random.randint(2**31))
+        else:
+            # An explicit seed (drawn as Dungeon would) lets --dungeon-cache key on it
+            self.dungeon = Dungeon(self.map_width, self.map_height, seed=np.random.randint(2**31),
+                                   cache_dir=dungeon_cache)
+        start_x, start_y = self.dungeon.center(self.dungeon.rooms[0])
+        self.player_tile = np.array([start_x, start_y])
+        self.prev_player_tile = self.player_tile.copy()
+        self.target_tile = self.player_tile.copy()
+        self.camera = Camera(self.map_width, self.map_height, SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE)
+        self.camera.center_on(*self.player_tile)
+        self.prev_camera = (self.camera.x, self.camera.y)
+        self.tile_renderer = TileRenderer(self.dungeon, TILE_SIZE)
+
+        self.entities = EntityStore()
+        self.objects = SpatialHash(cell_size=8)  # Entity views by tile, for viewport queries
+        self.effects = EffectsEngine()
+        self.flow_field = FlowField()  # shared ghost pathing; rebuilt only when the player changes tile
+        self.spawned_rooms = 0
+        if snapshot is None:
+            self.spawn_objects()
+
+        self.fog = FogOfWar(map_size=map_size, tile_size=TILE_SIZE)
+        self.field_of_view = FieldOfView(self.dungeon)
+        self.lighting = Lighting((SCREEN_WIDTH, SCREEN_HEIGHT), TILE_SIZE)
+        # The same tiles with the darkness already applied, for everywhere nothing else is drawn
+        self.dark_tile_renderer = TileRenderer(self.dungeon, TILE_SIZE, wall_color=self.lighting.darken(COLOR_WALL),
+                                               floor_color=self.lighting.darken(COLOR_FLOOR))
+        self.inventory = Inventory(clock=self.clock, assets=self.assets)
+
+        self.last_toggle_time = -1.0
+        self.tool_selected = 'axe'  # Default tool
+        self.tool_toggle_state = False
+        self.prev_hand_piece = False
+        self.hand_present = False
+        self.hand_snapshot = None
+
+        self.tool_display = ToolDisplay(assets=self.assets)
+        self.tool_display.set_tool(self.axe_icon)
+        lantern_size = (self.tool_display.box_size, self.tool_display.box_size)
+        self.hud = Hud((SCREEN_WIDTH, SCREEN_HEIGHT), self.inventory, self.tool_display, self.text_cache,
+                       self.assets.get("lantern", lantern_size))
+
+        # Torch flicker setup
+        self.flicker_angle = 0
+        self.flicker_speed = 0.1  # radians per step
+        self.flicker_amplitude = 1.0  # tile units
+        self.torch_radius = 0
+        self.torch_fov = None
+
+        # Per-step visual jitter, rolled in update() so rendering never touches the RNG
+        self.shake_offset = np.array([0, 0])
+        self.hit_offsets = {}  # entity id -> offset for objects hit this step
+
+        # Dirty-rect rendering: redraw and present only what changed while the camera holds still
+        self.dirty_rects = dirty_rects
+        self.update_rects = None  # rects for present(); None means a full flip
+        self.full_redraw = True
+        self.last_scene_key = None
+        self.last_sprite_rects = []
+        self.last_minimap_view = None
+
+        self.show_minimap = True
+        self.show_profiler = False
+        self.recording = False
+        self.running = True
+        self.frame_index = 0
+        self.step_count = 0
+        self.time = 0.0  # simulated seconds
+        self.render_time = 0.0  # simulated seconds at the interpolated render point
+
+        # Video recorders encode on worker threads; when the encoder falls behind, new frames are
+        # dropped or the frame waits, depending on record_policy. Videos hold one frame per
+        # simulation step, so they play back in real time whatever rate the window renders at.
+        self.game_recorder = VideoRecorder('game_capture.mp4', SIM_FPS, policy=record_policy)
+        self.hand_recorder = VideoRecorder('hand_capture.mp4', SIM_FPS, policy=record_policy)
+        self.recorded_step = 0  # step_count when the last video frame was written
+        self.replay_log = replay_log  # replay.ReplayLog of keys and hand state, if this run is logged
+
+        if snapshot is not None:
+            restore(self, snapshot)
+
+    def clock(self):
+        # For drawing only; update() reads self.time
+        return self.render_time
+
+    def spawn_objects(self):
+        # Populates rooms generated since the last call; a chunked dungeon adds rooms as it streams in.
+        # Exclude the starting room (index 0)
+        rooms = self.dungeon.rooms
+        start = max(self.spawned_rooms, 1)
+        self.spawned_rooms = len(rooms)
+        for i, room in enumerate(rooms[start:], start=start):
+            rx, ry = self.dungeon.center(room)
+            placed = set()
+
+            for _ in range(np.random.randint(2, 4)):  # Place 2–4 objects per room
+                obj_type = np.random.choice(['ghost', 'tree', 'loot'])
+                dx, dy = np.random.randint(-2, 2), np.random.randint(-2, 2)
+                pos = (rx + dx, ry + dy)
+
+                # Avoid placing multiple objects on same tile
+                if pos not in placed and 0 <= pos[0] < self.map_width and 0 <= pos[1] < self.map_height:
+                    if self.dungeon.tiles[pos[1], pos[0]] == TILE_FLOOR:
+                        self.objects.insert(self.entities.view(self.entities.spawn(pos, obj_type)))
+                        placed.add(pos)
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            self.full_redraw = True
+        elif event.type == pygame.KEYDOWN:
+            if self.replay_log is not None:
+                self.replay_log.key(self.step_count, pygame.key.name(event.key))
+            if event.key == pygame.K_q:
+                self.running = False
+            elif event.key == pygame.K_w:
+                self.target_tile[1] -= 1
+            elif event.key == pygame.K_s:
+                self.target_tile[1] += 1
+            elif event.key == pygame.K_a:
+                self.target_tile[0] -= 1
+            elif event.key == pygame.K_d:
+                self.target_tile[0] += 1
+            elif event.key == pygame.K_m:
+                self.show_minimap = not self.show_minimap
+            elif event.key == pygame.K_p:
+                self.show_profiler = not self.show_profiler
+                self.profiler.enabled = self.show_profiler or self.always_profile
+            elif event.key == pygame.K_r:
+                self.recording = not self.recording
+                self.recorded_step = self.step_count
+                print(f"Recording {'started' if self.recording else 'stopped'}.")
+
+    def update(self, dt=SIM_DT):
+        # One fixed simulation step. Tick-based timers (ghost delay, effects,
+        # flicker) assume dt == SIM_DT.
+        profiler = self.profiler
+        self.step_count += 1
+        self.time += dt
+        self.frame_index = (self.frame_index + 1) % self.player_sprite_sheet.num_frames
+        self.prev_player_tile = self.player_tile.copy()
+        self.prev_camera = (self.camera.x, self.camera.y)
+
+        with profiler.span("input"):
+            self.target_tile[0] = np.clip(self.target_tile[0], 0, self.map_width - 1)
+            self.target_tile[1] = np.clip(self.target_tile[1], 0, self.map_height - 1)
+
+            # Prevent walking through walls
+            if self.dungeon.tiles[self.target_tile[1], self.target_tile[0]] == TILE_FLOOR:
+                self.player_tile = self.target_tile.copy()
+
+            # One snapshot per step; the annotated camera frame is only built when recording
+            self.hand_snapshot = self.hand_detector.get_snapshot()
+            self.hand_present = self.hand_snapshot.hand_detected  # for torchlight
+            hand_piece = self.hand_snapshot.hand_piece
+            if self.replay_log is not None:
+                self.replay_log.hand_state(self.step_count - 1, self.hand_present, hand_piece)
+
+            # Peace sign toggles the tool, debounced in simulated time
+            if self.hand_present:
+                if hand_piece and not self.prev_hand_piece:
+                    if self.time - self.last_toggle_time > 0.5:
+                        self.tool_toggle_state = not self.tool_toggle_state
+                        self.tool_selected = 'bow' if self.tool_toggle_state else 'axe'
+                        self.tool_display.set_tool(self.bow_icon if self.tool_toggle_state else self.axe_icon)
+                        self.last_toggle_time = self.time
+                self.prev_hand_piece = hand_piece
+            else:
+                self.prev_hand_piece = False
+
+        # Screen shake while the player is recovering from a hit
+        status = self.player_status
+        self.shake_offset = np.random.randint(-4, 5, size=2) if status.get("screen_shake", 0) > 0 else np.array([0, 0])
+        status["screen_shake"] = max(0, status["screen_shake"] - 1)
+
+        # Center camera on player
+        self.camera.center_on(*self.player_tile)
+        if self.chunked:
+            self.stream_world()
+
+        with profiler.span("fog"):
+            if self.hand_present:
+                self.flicker_angle += self.flicker_speed
+                flicker = self.flicker_amplitude * np.sin(self.flicker_angle)
+                self.torch_radius = LIGHT_RADIUS + flicker
+                # Shadowcast FOV shared by fog and lighting; covers the whole flickering light circle
+                self.torch_fov = self.field_of_view.compute(self.player_tile, int(np.ceil(self.torch_radius)))
+                self.fog.update_fov(self.torch_fov)
+            else:
+                self.torch_radius = 0
+                self.torch_fov = None
+
+        with profiler.span("simulate"):
+            # One batched interaction step over all entities; re-bucket ghosts that moved
+            entities = self.entities
+            moved_ids, hit_ids = entities.update(self.player_tile, self.tool_selected, self.dungeon.tiles, TILE_FLOOR, status,
+                                                 self.flow_field)
+            for eid in moved_ids:
+                self.objects.update(entities.view(eid))
+            self.hit_offsets = {int(eid): np.random.randint(-2, 3, size=2) for eid in hit_ids}
+            self.update_lifecycle()
+
+    def stream_world(self):
+        # Keep the chunks around the camera loaded (one chunk of margin) and compress the rest
+        camera = self.camera
+        margin = self.dungeon.tiles.chunk_size
+        rect = (camera.x - margin, camera.y - margin,
+                camera.x + camera.tiles_wide + margin, camera.y + camera.tiles_high + margin)
+        self.dungeon.tiles.stream(*rect)
+        self.fog.explored.stream(*rect)
+        self.spawn_objects()
+
+    def update_lifecycle(self):
+        # Effects, drops, pickups and removal for collected or dead entities
+        entities = self.entities
+        removed_objects = []
+        new_objects = []
+        self.effects.update()
+        for eid in entities.finished_ids():
+            obj = entities.view(int(eid))
+
+            if obj.type == 'tree' and obj.collected and not obj.dropped:
+                drop_count = np.random.randint(1, 4)
+                possible_offsets = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
+                                    if np.abs(dx) + np.abs(dy) <= 2 and not (dx == 0 and dy == 0)]
+                np.random.shuffle(possible_offsets)
+                for dx, dy in possible_offsets[:drop_count]:
+                    wood_pos = obj.pos + np.array([dx, dy])
+                    new_objects.append(wood_pos)
+                obj.dropped = True
+                self.effects.start(obj.id, EFFECT_SHRINK, obj.pos, death_fade_duration)
+
+            if obj.type in ("loot", "wood"):
+                if obj.type == "loot" and obj.is_collectable():
+                    self.effects.start(obj.id, EFFECT_SPARKLE, obj.pos, sparkle_duration)
+                    self.effects.emit(obj.pos, 8, 0.12, sparkle_duration, COLOR_LOOT)
+                self.inventory.handle_pickup(obj, self.camera, (SCREEN_WIDTH, SCREEN_HEIGHT), self.item_icons,
+                                            now=self.time)
+
+            if obj.type == 'ghost':
+                # Ghosts vanish at once; a particle puff marks where they died
+                self.effects.emit(obj.pos, 10, 0.08, death_fade_duration, COLOR_GHOST)
+
+            # Finished entities stay until their effect has played out (at once if the pool was full)
+            if not self.effects.is_active(obj.id):
+                removed_objects.append(obj)
+
+        for obj in removed_objects:
+            self.objects.remove(obj)
+            entities.despawn(obj.id)
+        for wood_pos in new_objects:
+            self.objects.insert(entities.view(entities.spawn(wood_pos, 'wood')))
+
+    def render(self, alpha=1.0):
+        # Draws the state `alpha` of the way from the previous step to the current one
+        profiler = self.profiler
+        screen = self.screen
+        camera = self.camera
+        self.render_time = self.time - (1.0 - alpha) * SIM_DT
+
+        # World offset: screen shake plus the camera scrolling between steps
+        cam_dx = (camera.x - self.prev_camera[0]) * (1.0 - alpha) * TILE_SIZE
+        cam_dy = (camera.y - self.prev_camera[1]) * (1.0 - alpha) * TILE_SIZE
+        offset = (int(round(self.shake_offset[0] + cam_dx)), int(round(self.shake_offset[1] + cam_dy)))
+
+        # Where every visible object and the player land this frame
+        sprites = []
+        for obj in self.objects.query_rect(camera.x, camera.y, camera.tiles_wide, camera.tiles_high):
+            # apply offsets to enemies if that specific object was hit
+            hit = self.hit_offsets.get(obj.id)
+            sx, sy = camera.to_screen(*obj.lerp_pos(alpha))
+            draw_x = int(round(sx)) + offset[0] + (hit[0] if hit is not None else 0)
+            draw_y = int(round(sy)) + offset[1] + (hit[1] if hit is not None else 0)
+            sprites.append((obj, draw_x, draw_y))
+        player_pos = self.prev_player_tile + (self.player_tile - self.prev_player_tile) * alpha
+        px, py = camera.to_screen(*player_pos)
+        px = int(round(px)) + offset[0]
+        py = int(round(py)) + offset[1]
+
+        # Lighting: darken everything except the torch stamp around the player
+        with profiler.span("lighting"):
+            light_before = self.lighting.dirty_rect.copy()
+            if self.hand_present:
+                fov = self.torch_fov
+                fov_origin = camera.to_screen(fov.x0, fov.y0)
+                self.lighting.update((px + TILE_SIZE//2, py + TILE_SIZE//2), self.torch_radius * TILE_SIZE,
+                                     fov, (fov_origin[0] + offset[0], fov_origin[1] + offset[1]))
+            else:
+                self.lighting.update()
+
+        sprite_rects = self.sprite_rects(sprites, (px, py), offset)
+        self.update_rects = None
+        if self.dirty_rects:
+            self.update_rects = self.changed_rects(sprite_rects, offset, light_before)
+        if self.update_rects is None:
+            self.draw_scene(sprites, sprite_rects, (px, py), offset)
+            return
+
+        # Redraw the whole scene clipped to each changed rect; everything else is still on screen
+        for rect in self.update_rects:
+            screen.set_clip(rect)
+            self.draw_scene(sprites, sprite_rects, (px, py), offset)
+        screen.set_clip(None)
+
+    def sprite_rects(self, sprites, player_px, offset):
+        # Screen rects of everything drawn over the tiles: one per sprite (with its
+        # label), then the player and the effects
+        rects = []
+        for obj, draw_x, draw_y in sprites:
+            label = self.text_cache.render(obj.type, 16, (255, 255, 255))
+            rects.append(pygame.Rect(draw_x, draw_y - 18, max(TILE_SIZE, label.get_width()), TILE_SIZE + 18))
+        rects.append(pygame.Rect(player_px, (TILE_SIZE, TILE_SIZE)))
+        rects.extend(self.effects.screen_rects(self.camera, TILE_SIZE, offset))
+        return rects
+
+    def changed_rects(self, sprite_rects, offset, light_before):
+        # Rects that differ from the last presented frame, merged; None means redraw everything
+        camera = self.camera
+        scene_key = (camera.x, camera.y, offset, self.show_minimap, self.show_profiler)
+        full = self.full_redraw or scene_key != self.last_scene_key or self.show_profiler
+        self.full_redraw = False
+        self.last_scene_key = scene_key
+
+        rects = list(sprite_rects)
+        rects.append(light_before)
+        rects.append(self.lighting.dirty_rect.copy())
+
+        if self.show_minimap:
+            view = self.fog.minimap_view(self.player_tile)
+            x0, y0, w, h = view
+            if view != self.last_minimap_view or self.fog.dirty_chunks.intersection(
+                    self.fog.explored.chunks_in(x0, y0, x0 + w, y0 + h)):
+                rects.append(pygame.Rect(10, 10, view[2] * 4, view[3] * 4))
+            self.last_minimap_view = view
+        rects.extend(self.hud.changed_rects(self.player_status["health"], self.hand_present))
+
+        # This frame's rects plus last frame's, so whatever moved away gets erased
+        current = [r for r in rects if r.w > 0 and r.h > 0]
+        rects = merge_rects(current + self.last_sprite_rects, self.screen.get_rect())
+        self.last_sprite_rects = current
+        if full or sum(r.w * r.h for r in rects) > 0.6 * SCREEN_WIDTH * SCREEN_HEIGHT:
+            return None
+        return rects
+
+    def draw_scene(self, sprites, sprite_rects, player_px, offset):
+        # Tiles with nothing drawn on them and no torchlight look the same under the
+        # darkness every frame, so they are blitted already darkened. The scene is
+        # only composed and blended with the light buffer inside the merged rects
+        # around the sprites, player, effects and torch.
+        profiler = self.profiler
+        screen = self.screen
+        screen.fill((0, 0, 0))
+
+        # Draw dungeon from the cached tile layer; shake is just a blit offset
+        with profiler.span("tiles"):
+            self.dark_tile_renderer.draw(screen, self.camera, offset)
+
+        clip = screen.get_clip()
+        for rect in merge_rects(sprite_rects + [self.lighting.dirty_rect], clip):
+            screen.set_clip(rect)
+            inside = [sprite for sprite, sprite_rect in zip(sprites, sprite_rects) if rect.colliderect(sprite_rect)]
+            self.draw_lit(inside, player_px, offset)
+        screen.set_clip(clip)
+
+        # Minimap toggleable
+        with profiler.span("minimap"):
+            if self.show_minimap:
+                self.fog.draw_minimap(screen, self.dungeon, TILE_WALL, TILE_FLOOR, center=self.player_tile)
+
+        with profiler.span("hud"):
+            self.hud.draw(screen, self.player_status["health"], self.hand_present)
+
+        if self.show_profiler:
+            profiler.draw_overlay(screen, self.text_cache)
+
+    def draw_lit(self, sprites, player_px, offset):
+        # The full scene under the light buffer, clipped to the screen's clip rect
+        profiler = self.profiler
+        screen = self.screen
+        camera = self.camera
+        screen.fill((0, 0, 0))
+
+        with profiler.span("tiles"):
+            self.tile_renderer.draw(screen, camera, offset)
+
+        # Only on-screen objects are drawn; "objects" is timed without the nested "effects"
+        with profiler.span("objects"):
+            now_ms = int(self.render_time * 1000)
+            with profiler.span("effects"):
+                self.effects.draw(screen, camera, TILE_SIZE, offset)
+            for obj, draw_x, draw_y in sprites:
+                with profiler.span("effects"):
+                    draw_object_marker(screen, obj, camera, TILE_SIZE, now_ms, offset)
+
+                if obj.type == 'tree':
+                    frame = self.tree_sprite_sheet.get_frame(self.frame_index)
+                    screen.blit(frame, (draw_x, draw_y))
+                    if obj.health > 0:
+                        pygame.draw.rect(screen, (0, 255, 0), (draw_x, draw_y - 6, TILE_SIZE * (obj.health / 500), 4))
+                elif obj.type == 'ghost':
+                    screen.blit(self.ghost_icon, (draw_x, draw_y))
+                    if obj.health > 0:
+                        pygame.draw.rect(screen, (255, 0, 0), (draw_x, draw_y - 6, TILE_SIZE * (obj.health / 500), 4))
+                elif obj.type == "wood":
+                    screen.blit(self.wood_icon, (draw_x, draw_y))
+
+                label_color = (255, 255, 255)
+                label = self.text_cache.render(obj.type, 16, label_color)
+                screen.blit(label, (draw_x, draw_y - 18))
+
+        # Draw player
+        player_frame = self.player_sprite_sheet.get_frame(self.frame_index)
+        screen.blit(player_frame, player_px)
+
+        with profiler.span("lighting"):
+            screen.blit(self.lighting.buffer, (0, 0))
+
+    def present(self):
+        # Pushes the frame to the window: only the changed rects in dirty-rect mode, otherwise a full flip
+        if self.update_rects is None:
+            pygame.display.flip()
+        elif self.update_rects:
+            pygame.display.update(self.update_rects)
+
+    def record_frame(self):
+        # Save one video frame per simulation step since the last call, if recording. A frame
+        # that covers several steps is written that many times; frames without a step are skipped.
+        steps = self.step_count - self.recorded_step
+        if not self.recording or steps <= 0:
+            return
+        self.recorded_step = self.step_count
+        hand_frame = self.hand_detector.get_latest_frame(self.hand_snapshot)
+        for _ in range(steps):
+            self.game_recorder.write_surface(self.screen)
+            if hand_frame is not None:
+                self.hand_recorder.write_array(hand_frame)
+
+    def stats(self):
+        # Cache, pool, streaming and recorder counters; main.py prints them under --profile
+        stats = {
+            "Text cache": self.text_cache.stats(),
+            "Assets": self.assets.stats(),
+            "Effects": self.effects.stats(),
+        }
+        if self.chunked:
+            stats["Dungeon chunks"] = self.dungeon.tiles.stats()
+            stats["Fog chunks"] = self.fog.explored.stats()
+        stats["Game recording"] = self.game_recorder.stats()
+        stats["Hand recording"] = self.hand_recorder.stats()
+        if hasattr(self.hand_detector, "stats"):
+            stats["Hand detector"] = self.hand_detector.stats()
+        return stats
+
+    def close(self):
+        self.hand_detector.stop()
+        self.game_recorder.close()
+        self.hand_recorder.close()
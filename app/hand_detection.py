@@ -1,83 +1,305 @@
 import cv2
 import mediapipe as mp
+import multiprocessing
 import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
 import numpy as np
+from .adaptive_detection import AdaptiveDetection
+from .capture_sources import CameraSource
+from .detector_state import DetectorSnapshot, EMPTY_LANDMARKS, EMPTY_SNAPSHOT, is_peace_sign
+
+HAND_CONNECTIONS = tuple(mp.solutions.hands.HAND_CONNECTIONS)
+LANDMARK_COLOR = (0, 0, 255)
+CONNECTION_COLOR = (224, 224, 224)
+
+
+def annotate_frame(frame, landmarks):
+    # Returns a copy of frame with hand landmarks and connections drawn on it
+    annotated = frame.copy()
+    h, w = annotated.shape[:2]
+    for hand in landmarks:
+        points = [(int(x * w), int(y * h)) for x, y, _ in hand]
+        for start, end in HAND_CONNECTIONS:
+            cv2.line(annotated, points[start], points[end], CONNECTION_COLOR, 2)
+        for point in points:
+            cv2.circle(annotated, point, 2, LANDMARK_COLOR, 2)
+    return annotated
+
+
+def landmarks_from_results(results):
+    # MediaPipe results -> read-only (num_hands, 21, 3) float32 array
+    if not results.multi_hand_landmarks:
+        return EMPTY_LANDMARKS
+    landmarks = np.array(
+        [[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in results.multi_hand_landmarks],
+        dtype=np.float32,
+    )
+    landmarks.setflags(write=False)
+    return landmarks
+
 
 class HandDetector:
-    def __init__(self):
-        self.hand_detected = False
-        self.hand_piece = False
-        self.latest_frame = None
+    # `adaptive` is an AdaptiveDetection that picks which frames get inference
+    # and crops/downscales them; by default every frame runs at full resolution.
+    def __init__(self, source=None, adaptive=None):
+        # Readers only ever load this reference; the detector thread replaces it
+        # wholesale, so no lock is needed on either side
+        self.snapshot = EMPTY_SNAPSHOT
         self.running = True
-        self.lock = threading.Lock()
 
-        self.cap = cv2.VideoCapture(1)  # External camera
-        self.hands = mp.solutions.hands.Hands()
+        # Any capture_sources.FrameSource; defaults to the external camera
+        self.source = source if source is not None else CameraSource(1)
+        self.adaptive = adaptive if adaptive is not None else AdaptiveDetection(None, None, None)
+        # Tracking mode carries landmarks over from the previous image, which is wrong
+        # once consecutive inputs are crops at different offsets; detect from scratch then
+        self.hands = mp.solutions.hands.Hands(static_image_mode=self.adaptive.roi_margin is not None)
 
         self.thread = threading.Thread(target=self.detect_loop)
         self.thread.start()
 
     def detect_loop(self):
-        mp_drawing = mp.solutions.drawing_utils
+        seq = 0
+        while self.running:
+            ret, frame = self.source.read()  # backs off internally on failure
+            if not ret:
+                if self.source.finished:
+                    # Out of input: don't leave the last hand (or peace sign) detected forever
+                    self.snapshot = EMPTY_SNAPSHOT
+                    break
+                continue
+            captured_at = time.perf_counter()
+            adaptive = self.adaptive
+            frame.setflags(write=False)
+            if not adaptive.should_infer(captured_at):
+                # Keep the camera frame current for previews and recording; landmarks carry over
+                self.snapshot = self.snapshot._replace(timestamp=time.time(), frame=frame)
+                continue
 
+            image, roi = adaptive.prepare(frame)
+            results = self.hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            landmarks = adaptive.to_frame(landmarks_from_results(results), roi, frame.shape)
+            adaptive.observe(landmarks, roi, frame.shape, captured_at)
+
+            seq += 1
+            self.snapshot = DetectorSnapshot(
+                seq=seq,
+                timestamp=time.time(),
+                hand_detected=len(landmarks) > 0,
+                hand_piece=any(is_peace_sign(hand) for hand in landmarks),
+                landmarks=landmarks,
+                frame=frame,
+            )
+
+    def get_snapshot(self):
+        return self.snapshot
+
+    def is_hand_detected(self):
+        return self.snapshot.hand_detected
+
+    def is_hand_piece(self):
+        return self.snapshot.hand_piece
+
+    def get_latest_frame(self, snapshot=None):
+        # Copies and annotates only on request, from the given (or latest) snapshot
+        snapshot = snapshot or self.snapshot
+        if snapshot.frame is None:
+            return None
+        return annotate_frame(snapshot.frame, snapshot.landmarks)
+
+    def stats(self):
+        return self.adaptive.stats()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        self.source.release()
+
+
+def _inference_worker(inbox, outbox):
+    # Child process of ProcessHandDetector. First message: (shm name, ring shape);
+    # then (seq, slot) per captured frame, None to stop. Only the newest queued
+    # frame is processed; skipped ones are sent back with landmarks=None.
+    first = inbox.recv()
+    if first is None:
+        outbox.send(None)
+        return
+    shm_name, shape = first
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    hands = mp.solutions.hands.Hands()
+    try:
+        while True:
+            msg = inbox.recv()
+            while msg is not None and inbox.poll():
+                newer = inbox.recv()
+                outbox.send((msg[0], msg[1], None))
+                msg = newer
+            if msg is None:
+                break
+            seq, slot = msg
+            results = hands.process(cv2.cvtColor(ring[slot], cv2.COLOR_BGR2RGB))
+            outbox.send((seq, slot, landmarks_from_results(results)))
+    finally:
+        outbox.send(None)
+        hands.close()
+        del ring
+        shm.close()
+
+
+class ProcessHandDetector:
+    # Same API as HandDetector, but MediaPipe runs in a child process so its
+    # GIL-bound work can't stall the pygame loop. A capture thread copies each
+    # frame into one slot of a shared-memory ring buffer and sends only
+    # (seq, slot) down a pipe; landmarks come back on a second pipe and a result
+    # thread publishes them as snapshots. Frames are dropped, never queued,
+    # when every slot is in use. Latency is measured from capture to result.
+    def __init__(self, source=None, slots=4, latency_window=256):
+        self.snapshot = EMPTY_SNAPSHOT
+        self.running = True
+        self.source = source if source is not None else CameraSource(1)
+        self.slots = slots
+
+        self.shm = None
+        self.ring = None
+        self.free_slots = list(range(slots))
+        self.pending = {}  # seq -> (frame, capture time)
+        self.lock = threading.Lock()  # guards free_slots, pending and source_done between the two threads
+        self.source_done = False  # the source ran out; cleared to EMPTY_SNAPSHOT once pending drains
+
+        self.latencies = deque(maxlen=latency_window)  # seconds, capture -> result
+        self.captured = 0
+        self.processed = 0
+        self.skipped = 0  # superseded in the worker by a newer frame
+        self.dropped = 0  # no free slot when captured
+
+        ctx = multiprocessing.get_context("spawn")  # don't fork the pygame process
+        worker_inbox, self.frames_out = ctx.Pipe(duplex=False)
+        self.results_in, worker_outbox = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(target=_inference_worker, args=(worker_inbox, worker_outbox), daemon=True)
+        self.process.start()
+        worker_inbox.close()
+        worker_outbox.close()
+
+        self.capture_thread = threading.Thread(target=self.capture_loop)
+        self.result_thread = threading.Thread(target=self.result_loop)
+        self.capture_thread.start()
+        self.result_thread.start()
+
+    def _open_ring(self, shape):
+        shape = (self.slots,) + shape
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self.ring = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf)
+        return self._send((self.shm.name, shape))
+
+    def _send(self, msg):
+        try:
+            self.frames_out.send(msg)
+            return True
+        except OSError:
+            return False  # the worker exited
+
+    def capture_loop(self):
+        seq = 0
         while self.running:
-            ret, frame = self.cap.read()
+            ret, frame = self.source.read()  # backs off internally on failure
             if not ret:
+                if self.source.finished:
+                    with self.lock:
+                        self.source_done = True
+                        if not self.pending:
+                            self.snapshot = EMPTY_SNAPSHOT
+                    break
                 continue
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
-
-            annotated_frame = frame.copy()
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    mp_drawing.draw_landmarks(
-                        annotated_frame,
-                        hand_landmarks,
-                        mp.solutions.hands.HAND_CONNECTIONS
-                    )
+            captured_at = time.perf_counter()
+            self.captured += 1
+            if self.ring is None:
+                if not self._open_ring(frame.shape):
+                    break
+            elif frame.shape != self.ring.shape[1:]:
+                frame = cv2.resize(frame, (self.ring.shape[2], self.ring.shape[1]))
 
             with self.lock:
-                self.hand_detected = results.multi_hand_landmarks is not None
-                self.hand_piece = False
-                self.latest_frame = annotated_frame  
-
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        def extended(tip_idx, pip_idx):
-                            return hand_landmarks.landmark[tip_idx].y < hand_landmarks.landmark[pip_idx].y - 0.02
-
-                        index_extended = extended(8, 6)
-                        middle_extended = extended(12, 10)
-                        ring_curled = hand_landmarks.landmark[16].y > hand_landmarks.landmark[14].y + 0.02
-                        pinky_curled = hand_landmarks.landmark[20].y > hand_landmarks.landmark[18].y + 0.02
-                        thumb_curled = hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x  # right hand
-
-                        is_peace_sign = (
-                            index_extended and
-                            middle_extended and
-                            ring_curled and
-                            pinky_curled and
-                            thumb_curled
-                        )
-
-                        if is_peace_sign:
-                            self.hand_piece = True
-                            break
+                if not self.free_slots:
+                    self.dropped += 1
+                    continue
+                slot = self.free_slots.pop()
+                seq += 1
+                frame.setflags(write=False)
+                self.pending[seq] = (frame, captured_at)
+            self.ring[slot] = frame
+            if not self._send((seq, slot)):
+                break
 
+    def result_loop(self):
+        while True:
+            try:
+                msg = self.results_in.recv()
+            except EOFError:
+                break
+            if msg is None:
+                break
+            seq, slot, landmarks = msg
+            with self.lock:
+                frame, captured_at = self.pending.pop(seq)
+                self.free_slots.append(slot)
+            if landmarks is None:
+                self.skipped += 1
+            else:
+                self.latencies.append(time.perf_counter() - captured_at)
+                self.processed += 1
+                self.snapshot = DetectorSnapshot(
+                    seq=seq,
+                    timestamp=time.time(),
+                    hand_detected=len(landmarks) > 0,
+                    hand_piece=any(is_peace_sign(hand) for hand in landmarks),
+                    landmarks=landmarks,
+                    frame=frame,
+                )
+            with self.lock:
+                if self.source_done and not self.pending:
+                    # Last result of a finished source is in; see capture_loop
+                    self.snapshot = EMPTY_SNAPSHOT
+
+    def get_snapshot(self):
+        return self.snapshot
 
     def is_hand_detected(self):
-        with self.lock:
-            return self.hand_detected
+        return self.snapshot.hand_detected
 
     def is_hand_piece(self):
-        with self.lock:
-            return self.hand_piece
+        return self.snapshot.hand_piece
 
-    def get_latest_frame(self):
-        with self.lock:
-            return self.latest_frame.copy() if self.latest_frame is not None else None
+    def get_latest_frame(self, snapshot=None):
+        snapshot = snapshot or self.snapshot
+        if snapshot.frame is None:
+            return None
+        return annotate_frame(snapshot.frame, snapshot.landmarks)
+
+    def stats(self):
+        latencies = np.asarray(self.latencies) * 1000
+        return {
+            "captured": self.captured,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "latency_mean_ms": round(float(latencies.mean()), 3) if latencies.size else None,
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3) if latencies.size else None,
+        }
 
     def stop(self):
         self.running = False
-        self.thread.join()
-        self.cap.release()
+        self.capture_thread.join()
+        self._send(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.result_thread.join()
+        self.frames_out.close()
+        self.results_in.close()
+        self.source.release()
+        if self.shm is not None:
+            self.ring = None
+            self.shm.close()
+            self.shm.unlink()
@@ -0,0 +1,93 @@
+# headless.py
+import json
+import os
+
+import numpy as np
+import pygame
+
+from .detector_state import DetectorSnapshot, EMPTY_LANDMARKS
+
+
+def use_dummy_video_driver():
+    # Must run before pygame.init / display.set_mode
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+def load_script(path):
+    # Script file: {"events": [{"step": 0, "hand": true}, {"step": 4, "keys": ["d"]}, ...]}, keyed by
+    # simulation step (scripts written before the rename use "frame" for the same thing)
+    with open(path) as f:
+        return json.load(f)["events"]
+
+
+def random_script(num_steps, seed=0, move_every=3):
+    # Seeded walk with the hand shown/hidden and the peace sign flashed now and then
+    rng = np.random.default_rng(seed)
+    events = [{"step": 0, "hand": True, "peace": False}]
+    for step in range(move_every, num_steps, move_every):
+        event = {"step": step, "keys": [str(rng.choice(["w", "a", "s", "d"]))]}
+        if step % 60 == 0:
+            event["hand"] = bool(rng.random() < 0.8)
+        if step % 45 == 0:
+            event["peace"] = bool(rng.random() < 0.5)
+        events.append(event)
+    return events
+
+
+class ScriptedInput:
+    # Replays script events as pygame KEYDOWN events and as hand detector
+    # state; it exposes the HandDetector API so the game can't tell the difference
+    def __init__(self, events):
+        self.events = {}
+        for event in events:
+            step = event["step"] if "step" in event else event["frame"]
+            self.events.setdefault(int(step), []).append(event)
+        self.hand_detected = False
+        self.hand_piece = False
+        self.snapshot = DetectorSnapshot(0, 0.0, False, False, EMPTY_LANDMARKS, None)
+
+    def advance(self, step):
+        # Returns the key events scheduled before simulation step `step` and updates hand state
+        key_events = []
+        for event in self.events.get(step, ()):
+            for name in event.get("keys", ()):
+                key_events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.key.key_code(name)))
+            self.hand_detected = event.get("hand", self.hand_detected)
+            self.hand_piece = event.get("peace", self.hand_piece)
+        self.snapshot = DetectorSnapshot(
+            step, step, self.hand_detected, self.hand_detected and self.hand_piece, EMPTY_LANDMARKS, None
+        )
+        return key_events
+
+    def get_snapshot(self):
+        return self.snapshot
+
+    def is_hand_detected(self):
+        return self.snapshot.hand_detected
+
+    def is_hand_piece(self):
+        return self.snapshot.hand_piece
+
+    def get_latest_frame(self, snapshot=None):
+        return None
+
+    def stop(self):
+        pass
+
+
+def frame_time_report(frame_times):
+    # frame_times in seconds; returns summary stats in milliseconds
+    times = np.asarray(frame_times, dtype=np.float64) * 1000
+    if times.size == 0:
+        return {"frames": 0}
+    p50, p90, p99 = np.percentile(times, [50, 90, 99])
+    return {
+        "frames": int(times.size),
+        "mean_ms": round(float(times.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(times.max()), 3),
+        "fps": round(float(1000 / times.mean()), 1),
+    }
@@ -0,0 +1,123 @@
+# hud.py
+import pygame
+
+
+class HealthBar:
+    # Bar plus "N HP" label, rendered into one cached surface that is only
+    # redrawn when the health value changes
+    def __init__(self, text_cache, bar_width=200, bar_height=20, max_health=100):
+        self.text_cache = text_cache
+        self.bar_width = bar_width
+        self.bar_height = bar_height
+        self.max_health = max_health
+        self.health = None
+        self.surface = None
+
+    def set_health(self, health):
+        if health == self.health:
+            return
+        self.health = health
+        self.surface = None
+
+    @property
+    def dirty(self):
+        return self.surface is None
+
+    def draw(self):
+        if self.surface is not None:
+            return self.surface
+
+        # Health text (red), to the right of the bar
+        health_text = self.text_cache.render(f"{self.health} HP", 20, (255, 0, 0))
+        width = self.bar_width + 8 + health_text.get_width()
+        height = max(self.bar_height, health_text.get_height())
+        surf = pygame.Surface((width, height), pygame.SRCALPHA)
+
+        # Background bar (gray)
+        pygame.draw.rect(surf, (50, 50, 50), (0, 0, self.bar_width, self.bar_height))
+        # Health fill (green)
+        health_ratio = self.health / self.max_health
+        pygame.draw.rect(surf, (0, 200, 0), (0, 0, int(self.bar_width * health_ratio), self.bar_height))
+        surf.blit(health_text, (self.bar_width + 8, 0))
+        self.surface = surf
+        return surf
+
+
+class Hud:
+    # Retained-mode HUD: each widget keeps its rendered surface and redraws it
+    # only when marked dirty (inventory add/remove, tool toggle, health change);
+    # a frame just composites the cached surfaces. Pickup fly-ins are drawn
+    # on top as a transient overlay.
+    def __init__(self, screen_size, inventory, tool_display, text_cache, lantern_icon=None, margin=8):
+        self.screen_width, self.screen_height = screen_size
+        self.inventory = inventory
+        self.tool_display = tool_display
+        self.health_bar = HealthBar(text_cache)
+        self.lantern_icon = lantern_icon  # already scaled to the tool box
+        self.margin = margin
+        self.redraws = 0  # widget surfaces rebuilt, for profiling
+        self.last_lantern = None
+        self.last_animation_rects = []
+
+    def changed_rects(self, health, hand_present):
+        # Screen rects that will look different once draw() runs with these values:
+        # dirty widgets, a lantern toggle, and pickup fly-ins (last frame's and this frame's)
+        rects = []
+        inv = self.inventory
+        inv_origin = self.inventory_origin()
+        if inv.dirty:
+            rects.append(pygame.Rect(inv_origin, inv.surface.get_size()))
+        tool_rect = self.tool_rect()
+        if self.tool_display.dirty:
+            rects.append(tool_rect)
+        if hand_present != self.last_lantern and self.lantern_icon is not None:
+            rects.append(pygame.Rect((tool_rect.x, tool_rect.y - self.lantern_icon.get_height() - 4),
+                                     self.lantern_icon.get_size()))
+            self.last_lantern = hand_present
+        if health != self.health_bar.health:
+            rects.append(self.health_rect())
+        animation_rects = inv.animation_rects(inv_origin)
+        rects.extend(self.last_animation_rects)
+        rects.extend(animation_rects)
+        self.last_animation_rects = animation_rects
+        return rects
+
+    def tool_rect(self):
+        size = self.tool_display.box_size
+        return pygame.Rect(self.margin, self.screen_height - size - self.margin, size, size)
+
+    def health_rect(self):
+        bar = self.health_bar
+        # Runs to the screen edge so the label is covered whatever its width
+        x = self.screen_width - bar.bar_width - 70
+        return pygame.Rect(x, 20, self.screen_width - x, max(bar.bar_height, 24))
+
+    def inventory_origin(self):
+        inv = self.inventory.surface
+        return (self.screen_width // 2 - inv.get_width() // 2,
+                self.screen_height - inv.get_height() - self.margin)
+
+    def draw(self, screen, health, hand_present):
+        self.redraws += self.inventory.dirty + self.tool_display.dirty
+
+        # Inventory at the bottom of the screen
+        inv_origin = self.inventory_origin()
+        screen.blit(self.inventory.draw(), inv_origin)
+
+        # Current tool icon on the bottom-left corner
+        tool_surface = self.tool_display.draw()
+        tool_x = self.margin
+        tool_y = self.screen_height - tool_surface.get_height() - self.margin
+        screen.blit(tool_surface, (tool_x, tool_y))
+
+        # Lantern icon above the tool if hand is detected
+        if hand_present and self.lantern_icon is not None:
+            lantern_y = tool_y - self.lantern_icon.get_height() - 4
+            screen.blit(self.lantern_icon, (tool_x, lantern_y))
+
+        # Player health, top right
+        self.health_bar.set_health(health)
+        self.redraws += self.health_bar.dirty
+        screen.blit(self.health_bar.draw(), (self.screen_width - self.health_bar.bar_width - 70, 20))
+
+        self.inventory.draw_animations(screen, inv_origin)
@@ -3,23 +3,30 @@ import numpy as np
 import time
 
 class Inventory:
-    def __init__(self, slot_count=9, slot_size=48):
+    def __init__(self, slot_count=9, slot_size=48, clock=time.time, assets=None):
+        self.clock = clock  # seconds, for drawing fly-ins; Game passes its interpolated render time
+        # Icons are scaled to the slot size once, when added; an AssetManager shares those copies
+        self.scale = assets.scale if assets is not None else pygame.transform.scale
         self.slot_count = slot_count
         self.slot_size = slot_size
         self.items = [None] * slot_count  # Holds surfaces of item icons
+        self.item_keys = [None] * slot_count  # icon key per slot ("loot", "wood"), for snapshots
         self.surface = pygame.Surface((slot_size * slot_count, slot_size), pygame.SRCALPHA)
+        self.dirty = True  # slots are only redrawn after add_item/remove_item
         self.animations = []  # list of (start_time, duration, image, start_pos, end_pos)
 
-    def add_item(self, item_image, start_pos=None):
+    def add_item(self, item_image, start_pos=None, key=None, now=None):
+        # `now` stamps the fly-in start (default: clock()); Game passes simulated time from update()
+        item_image = self.scale(item_image, (self.slot_size, self.slot_size))
         for i in range(self.slot_count):
             if self.items[i] is None:
-                self.items[i] = item_image
+                self.set_item(i, item_image, key)
 
                 if start_pos is not None:
                     end_x = i * self.slot_size
                     end_y = 0
                     animation = {
-                        'start_time': time.time(),
+                        'start_time': self.clock() if now is None else now,
                         'duration': 0.5,
                         'image': item_image,
                         'start_pos': start_pos,
@@ -28,28 +35,35 @@ class Inventory:
                     self.animations.append(animation)
                 return  # Only add once
 
+    def set_item(self, index, item_image, key=None):
+        self.items[index] = None if item_image is None else self.scale(item_image, (self.slot_size, self.slot_size))
+        self.item_keys[index] = key
+        self.dirty = True
+
     def remove_item(self, index):
-        if 0 <= index < self.slot_count:
-            self.items[index] = None
+        if 0 <= index < self.slot_count and self.items[index] is not None:
+            self.set_item(index, None)
 
     def draw(self):
+        # Slot borders and icons; the cached surface is returned as is until an item changes
+        if not self.dirty:
+            return self.surface
         self.surface.fill((0, 0, 0, 0))
-        now = time.time()
-
-        # Draw inventory slots and static icons
         for i in range(self.slot_count):
             x = i * self.slot_size
             rect = pygame.Rect(x, 0, self.slot_size, self.slot_size)
             pygame.draw.rect(self.surface, (255, 255, 255), rect, 2)
             if self.items[i] is not None:
-                icon = pygame.transform.scale(self.items[i], (self.slot_size, self.slot_size))
-                self.surface.blit(icon, (x, 0))
+                self.surface.blit(self.items[i], (x, 0))
+        self.dirty = False
+        return self.surface
 
-        # Draw any flying animated items
-        finished = []
+    def animation_positions(self, now):
+        # (anim, x, y, finished) for every fly-in, relative to the inventory surface
+        out = []
         for anim in self.animations:
             elapsed = now - anim['start_time']
-            t = min(elapsed / anim['duration'], 1.0)
+            t = min(max(elapsed / anim['duration'], 0.0), 1.0)  # render time can trail the step that started it
 
             start_x, start_y = anim['start_pos']
             end_x, end_y = anim['end_pos']
@@ -58,19 +72,26 @@ class Inventory:
             ease_t = 1 - (1 - t)**3
             x = start_x + (end_x - start_x) * ease_t
             y = start_y + (end_y - start_y) * ease_t
+            out.append((anim, x, y, t >= 1.0))
+        return out
 
-            icon = pygame.transform.scale(anim['image'], (self.slot_size, self.slot_size))
-            self.surface.blit(icon, (x, y))
+    def animation_rects(self, origin):
+        return [pygame.Rect(int(origin[0] + x), int(origin[1] + y), self.slot_size + 1, self.slot_size + 1)
+                for anim, x, y, _ in self.animation_positions(self.clock())]
 
-            if t >= 1.0:
+    def draw_animations(self, screen, origin):
+        # Pickup fly-ins, drawn straight onto the screen as a transient overlay.
+        # Positions are relative to the inventory surface placed at `origin`.
+        finished = []
+        for anim, x, y, done in self.animation_positions(self.clock()):
+            screen.blit(anim['image'], (origin[0] + x, origin[1] + y))
+            if done:
                 finished.append(anim)
 
         # Clean up finished animations
         for anim in finished:
             self.animations.remove(anim)
 
-        return self.surface
-
     def get_surface(self):
         return self.surface
 
@@ -78,7 +99,7 @@ class Inventory:
         view = pygame.surfarray.array3d(self.surface)
         return np.moveaxis(view, 0, 1)
     
-    def handle_pickup(self, obj, camera, screen_size, icon_lookup):
+    def handle_pickup(self, obj, camera, screen_size, icon_lookup, now=None):
         if not obj.is_collectable():
             return
 
@@ -93,6 +114,6 @@ class Inventory:
         item_icon = icon_lookup.get(item_type)
 
         if item_icon:
-            self.add_item(item_icon, start_pos=inv_relative_pos)
+            self.add_item(item_icon, start_pos=inv_relative_pos, key=item_type, now=now)
             obj.mark_as_added_to_inventory()
 
@@ -0,0 +1,129 @@
+# lighting.py
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+
+class Lighting:
+    # Keeps one persistent full-screen darkness buffer. Each frame only the rect
+    # around the torch is rewritten (from a cached soft-falloff stamp plus FOV
+    # occlusion) and the previous torch rect is restored to plain darkness.
+    def __init__(self, screen_size, tile_size, darkness=200, radius_step=4, inner=0.6, max_fovs=4, max_lights=64):
+        self.screen_rect = pygame.Rect((0, 0), screen_size)
+        self.tile_size = tile_size
+        self.darkness = darkness
+        self.radius_step = radius_step  # px; flicker radii are snapped to this grid
+        self.inner = inner  # fraction of the radius that is fully lit
+        self.stamps = {}  # quantized radius (px) -> (2R, 2R) uint8 alpha, indexed [x, y]
+        self.buffer = pygame.Surface(screen_size, pygame.SRCALPHA)
+        self.buffer.fill((0, 0, 0, darkness))
+        self.dirty_rect = pygame.Rect(0, 0, 0, 0)  # torch rect written last frame
+        self.written = (None, None)  # (alpha array, unclipped rect) behind dirty_rect
+        self.max_fovs = max_fovs
+        self.max_lights = max_lights
+        # id(FovResult) -> (FovResult, its hidden tiles upscaled to pixels in [x, y] order), LRU order.
+        # The result is kept alongside so its id can't be reused while cached.
+        self.occlusions = OrderedDict()
+        self.lights = {}  # (id(FovResult), offset from its origin, stamp size) -> stamp combined with occlusion
+
+    def darken(self, color):
+        # `color` as it looks after the buffer is blitted over it outside the torch rect
+        pixel = pygame.Surface((1, 1))
+        pixel.fill(color)
+        shade = pygame.Surface((1, 1), pygame.SRCALPHA)
+        shade.fill((0, 0, 0, self.darkness))
+        pixel.blit(shade, (0, 0))
+        return tuple(pixel.get_at((0, 0)))[:3]
+
+    def quantize(self, radius_px):
+        step = self.radius_step
+        return max(step, int(round(radius_px / step)) * step)
+
+    def get_stamp(self, radius_px):
+        radius = self.quantize(radius_px)
+        stamp = self.stamps.get(radius)
+        if stamp is None:
+            offsets = np.arange(2 * radius, dtype=np.float32) - radius + 0.5
+            dist = np.sqrt(offsets[:, np.newaxis] ** 2 + offsets[np.newaxis, :] ** 2) / radius
+            t = np.clip((dist - self.inner) / (1.0 - self.inner), 0.0, 1.0)
+            falloff = t * t * (3.0 - 2.0 * t)  # smoothstep
+            stamp = (falloff * self.darkness).astype(np.uint8)
+            self.stamps[radius] = stamp
+        return stamp
+
+    def _torch_light(self, stamp, fov, fov_origin, light_rect):
+        # Stamp with FOV occlusion applied. FieldOfView hands back the same
+        # FovResult while the player stays on a tile (one per flicker radius),
+        # so the upscaled occlusion and the combined alpha are only rebuilt when
+        # the FOV or the torch's offset from it changes.
+        entry = self.occlusions.get(id(fov))
+        if entry is None or entry[0] is not fov:
+            if entry is not None:
+                self.lights.clear()  # id reused by a new result; its lights are stale
+            ts = self.tile_size
+            hidden = np.where(fov.visible.T, 0, self.darkness).astype(np.uint8)
+            entry = (fov, np.repeat(np.repeat(hidden, ts, axis=0), ts, axis=1))
+            self.occlusions[id(fov)] = entry
+            if len(self.occlusions) > self.max_fovs:
+                self.occlusions.popitem(last=False)
+                self.lights.clear()
+        else:
+            self.occlusions.move_to_end(id(fov))
+
+        ox, oy = light_rect.x - fov_origin[0], light_rect.y - fov_origin[1]
+        key = (id(fov), ox, oy, light_rect.w)
+        light = self.lights.get(key)
+        if light is None:
+            if len(self.lights) >= self.max_lights:
+                self.lights.clear()
+            light = np.maximum(stamp, self._occlusion(entry[1], ox, oy, light_rect.w))
+            self.lights[key] = light
+        return light
+
+    def _occlusion(self, pixels, ox, oy, size):
+        # Per-pixel darkness for the size x size rect at (ox, oy) of the upscaled FOV window; [x, y] order
+        out = np.full((size, size), self.darkness, dtype=np.uint8)
+        sx0, sy0 = max(ox, 0), max(oy, 0)
+        sx1 = min(ox + size, pixels.shape[0])
+        sy1 = min(oy + size, pixels.shape[1])
+        if sx1 > sx0 and sy1 > sy0:
+            out[sx0 - ox:sx1 - ox, sy0 - oy:sy1 - oy] = pixels[sx0:sx1, sy0:sy1]
+        return out
+
+    def update(self, center=None, radius_px=0, fov=None, fov_origin=(0, 0)):
+        # Rewrites only last frame's torch rect and this frame's; returns the new torch rect.
+        # A torch that lands on the same rect with the same cached alpha leaves the buffer alone.
+        light_rect = clipped = None
+        if center is not None and radius_px > 0:
+            stamp = self.get_stamp(radius_px)
+            size = stamp.shape[0]
+            light_rect = pygame.Rect(center[0] - size // 2, center[1] - size // 2, size, size)
+            clipped = light_rect.clip(self.screen_rect)
+            if clipped.w == 0 or clipped.h == 0:
+                light_rect = None
+        if light_rect is not None:
+            light = self._torch_light(stamp, fov, fov_origin, light_rect) if fov is not None else stamp
+            if light is self.written[0] and light_rect == self.written[1]:
+                return self.dirty_rect
+
+        if self.dirty_rect.w and self.dirty_rect.h:
+            self.buffer.fill((0, 0, 0, self.darkness), self.dirty_rect)
+            self.dirty_rect = pygame.Rect(0, 0, 0, 0)
+        self.written = (None, None)
+        if light_rect is None:
+            return self.dirty_rect
+
+        lx, ly = clipped.x - light_rect.x, clipped.y - light_rect.y
+        alpha = pygame.surfarray.pixels_alpha(self.buffer)
+        alpha[clipped.left:clipped.right, clipped.top:clipped.bottom] = light[lx:lx + clipped.w, ly:ly + clipped.h]
+        del alpha  # unlock the buffer before it is blitted
+
+        self.dirty_rect = clipped
+        self.written = (light, light_rect)
+        return clipped
+
+    def draw(self, screen, center=None, radius_px=0, fov=None, fov_origin=(0, 0)):
+        rect = self.update(center, radius_px, fov, fov_origin)
+        screen.blit(self.buffer, (0, 0))
+        return rect
@@ -1,314 +1,227 @@
 # main.py
+import argparse
 import numpy as np
 import pygame
 import time
-import cv2 as cv
-from .dungeon import Dungeon
-from .camera import Camera
-from .dungeon import TILE_WALL, TILE_FLOOR
-from .hand_detection import HandDetector
-from .game_objects import GameObject
-from .minimap import FogOfWar
-from .effects import draw_object_effect, death_counters, sparkle_counters
-from .sprite_loader import SpriteSheet
-from .inventory import Inventory
-from .tool_display import ToolDisplay
-
-
-# --- Constants ---
-SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-TILE_SIZE = 24
-MAP_WIDTH, MAP_HEIGHT = 60, 45
-FPS = 15
-LIGHT_RADIUS = 7  # in tiles
-
-# --- Colors ---
-COLOR_WALL = (40, 40, 40)
-COLOR_FLOOR = (150, 150, 150)
-COLOR_PLAYER = (0, 0, 255)
-
-# --- Setup ---
-pygame.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Torchlit Dungeon Crawler")
-clock = pygame.time.Clock()
-
-# Load sprite sheets
-player_sprite_sheet = SpriteSheet("assets/player_ready.png", frame_width=24, frame_height=24)
-tree_sprite_sheet = SpriteSheet("assets/tree_idle_ready.png", frame_width=24, frame_height=24)
-coin_icon = pygame.image.load("assets/coin_ready.png").convert_alpha()
-wood_icon = pygame.image.load("assets/wood_ready.png").convert_alpha()
-axe_icon = pygame.image.load("assets/axe_24.png").convert_alpha()
-bow_icon = pygame.image.load("assets/bow_ready.png").convert_alpha()
-lantern_icon = pygame.transform.scale(pygame.image.load("assets/lantern_ready.png").convert_alpha(), (TILE_SIZE, TILE_SIZE))
-ghost_icon = pygame.image.load("assets/ghost_ready.png").convert_alpha()
-
-# Initialize player 
-player_status = {"health": 100, "screen_shake": 0}
-
-
-# Initialize dungeon
-dungeon = Dungeon(MAP_WIDTH, MAP_HEIGHT)
-start_x, start_y = dungeon.center(dungeon.rooms[0])
-player_tile = np.array([start_x, start_y])
-target_tile = player_tile.copy()
-camera = Camera(MAP_WIDTH, MAP_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE)
-
-objects = []
-
-# initialize objects
-# Exclude the starting room (index 0)
-for i, room in enumerate(dungeon.rooms[1:], start=1):
-    rx, ry = dungeon.center(room)
-    placed = set()
-
-    for _ in range(np.random.randint(2, 4)):  # Place 2–4 objects per room
-        obj_type = np.random.choice(['ghost', 'tree', 'loot'])
-        dx, dy = np.random.randint(-2, 2), np.random.randint(-2, 2)
-        pos = (rx + dx, ry + dy)
-
-        # Avoid placing multiple objects on same tile
-        if pos not in placed and 0 <= pos[0] < MAP_WIDTH and 0 <= pos[1] < MAP_HEIGHT:
-            if dungeon.tiles[pos[1], pos[0]] == TILE_FLOOR:
-                objects.append(GameObject(pos, obj_type))
-                placed.add(pos)
-
-
-fog = FogOfWar(map_size=(MAP_WIDTH, MAP_HEIGHT), tile_size=TILE_SIZE)
-hand_detector = HandDetector()
-inventory = Inventory()
-
-last_toggle_time = 0.0
-tool_selected = 'axe'  # Default tool
-tool_toggle_state = False
-prev_hand_piece = False
-
-# --- NEW: Setup tool display ---
-tool_display = ToolDisplay()
-tool_display.set_tool(axe_icon)
-
-# Torch flicker setup
-flicker_angle = 0
-flicker_speed = 0.1
-flicker_amplitude = 1.0  # tile units
-show_minimap = True
-recording = False
-frame_index = 0
-
-# Setup OpenCV video writer
-fourcc = cv.VideoWriter_fourcc(*'mp4v')
-out = cv.VideoWriter('game_capture.mp4', fourcc, FPS, (SCREEN_WIDTH, SCREEN_HEIGHT))
-hand_out = None
-hand_frame = None
-
-# --- Main Loop ---
-running = True
-while running:
-    clock.tick(FPS)
-    screen.fill((0, 0, 0))
-    frame_index = (frame_index + 1) % player_sprite_sheet.num_frames
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_q:
-                running = False
-            elif event.key == pygame.K_w:
-                target_tile[1] -= 1
-            elif event.key == pygame.K_s:
-                target_tile[1] += 1
-            elif event.key == pygame.K_a:
-                target_tile[0] -= 1
-            elif event.key == pygame.K_d:
-                target_tile[0] += 1
-            elif event.key == pygame.K_m:
-                show_minimap = not show_minimap
-            elif event.key == pygame.K_r:
-                recording = not recording
-                print(f"Recording {'started' if recording else 'stopped'}.")
-
-    target_tile[0] = np.clip(target_tile[0], 0, MAP_WIDTH - 1)
-    target_tile[1] = np.clip(target_tile[1], 0, MAP_HEIGHT - 1)
-
-    # Prevent walking through walls
-    if dungeon.tiles[target_tile[1], target_tile[0]] == TILE_FLOOR:
-        player_tile = target_tile.copy()
-
-
-    hand_present = hand_detector.is_hand_detected()  # for torchlight
-    hand_piece = hand_detector.is_hand_piece()
-    hand_frame = hand_detector.get_latest_frame()
-
-    # New toggle logic
-    if hand_present:
-        if hand_piece and not prev_hand_piece:
-            if time.time() - last_toggle_time > 0.5:
-                tool_toggle_state = not tool_toggle_state
-                tool_selected = 'bow' if tool_toggle_state else 'axe'  
-                tool_display.set_tool(bow_icon if tool_toggle_state else axe_icon)
-                last_toggle_time = time.time()
-        prev_hand_piece = hand_piece
+from .game import Game, SCREEN_WIDTH, SCREEN_HEIGHT, SIM_FPS, SIM_DT, MAP_WIDTH, MAP_HEIGHT
+from .text_cache import TextCache
+from .capture_sources import open_source
+from .adaptive_detection import AdaptiveDetection
+from .profiler import FrameProfiler
+from .snapshot import Autosaver, load_snapshot, save_snapshot
+from .replay import ReplayLog, load_replay, render_video
+from .recorder import POLICY_DROP, POLICY_BLOCK
+from .headless import ScriptedInput, use_dummy_video_driver, load_script, random_script, frame_time_report
+
+
+RENDER_FPS = 60
+MAX_FRAME_TIME = 0.25  # clamp long stalls so the simulation doesn't spiral catching up
+
+
+def run(args):
+    # --- Setup ---
+    if args.replay:
+        # Play a replay log back: headless, one step per frame, same seed, map and input
+        log = load_replay(args.replay)
+        if args.replay_video:
+            written = render_video(log, args.replay_video, workers=args.workers)
+            print(f"Rendered {written} frames to {args.replay_video}")
+            return []
+        args.headless = True
+        args.seed = log["seed"]
+        args.map_size = tuple(log["map_size"])
+        args.frames = log["steps"]
+        args.steps_per_frame = 1
+        args.uncapped = True
+    if args.replay_out and args.seed is None:
+        args.seed = int(np.random.randint(2**31))  # a logged run needs a known seed
+    if args.headless:
+        use_dummy_video_driver()
+    if args.seed is not None:
+        np.random.seed(args.seed)  # dungeon, objects, drops and shake all draw from np.random
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Torchlit Dungeon Crawler")
+    clock = pygame.time.Clock()
+
+    if args.headless:
+        # Scripted keys and gestures stand in for the keyboard and the webcam
+        if args.replay:
+            script = log["events"]
+        else:
+            steps = (args.frames or 900) * args.steps_per_frame
+            script = load_script(args.script) if args.script else random_script(steps, args.seed or 0)
+        hand_detector = ScriptedInput(script)
     else:
-        prev_hand_piece = False
-
-    # Apply screen shake offset if player gets
-    shake_offset = np.random.randint(-4, 5, size=2) if player_status.get("screen_shake", 0) > 0 else np.array([0, 0])
-    player_status["screen_shake"] = max(0, player_status["screen_shake"] - 1)
-
-
-    # Center camera on player
-    camera.center_on(*player_tile)
-
-    # Determine torch status before drawing
-    if hand_present:
-        flicker_angle += flicker_speed
-        flicker = flicker_amplitude * np.sin(flicker_angle)
-        torch_radius = LIGHT_RADIUS + flicker
-        fog.update(player_tile, int(torch_radius))
-    else:
-        torch_radius = 0
-
-    # Draw dungeon
-    for y in range(camera.y, camera.y + camera.tiles_high):
-        for x in range(camera.x, camera.x + camera.tiles_wide):
-            if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
-                tile = dungeon.tiles[y, x]
-                color = COLOR_WALL if tile == TILE_WALL else COLOR_FLOOR
-                sx, sy = camera.to_screen(x, y)
-                sx += shake_offset[0]
-                sy += shake_offset[1]
-                pygame.draw.rect(screen, color, (sx, sy, TILE_SIZE, TILE_SIZE))
-
-    # Object interaction and rendering
-    updated_objects = []
-    new_objects = []
-    for obj in objects:
-        prev_health = obj.health
-        obj.interact(player_tile, tool_selected, dungeon, TILE_FLOOR, player_status)
-        draw_object_effect(screen, obj, camera, TILE_SIZE)
-
-        if obj.type == 'tree' and obj.collected and not hasattr(obj, 'dropped'):
-            drop_count = np.random.randint(1, 4)
-            possible_offsets = [(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
-                                if np.abs(dx) + np.abs(dy) <= 2 and not (dx == 0 and dy == 0)]
-            np.random.shuffle(possible_offsets)
-            for dx, dy in possible_offsets[:drop_count]:
-                wood_pos = obj.pos + np.array([dx, dy])
-                new_objects.append(GameObject(wood_pos, 'wood'))
-            obj.dropped = True
-
-        # apply offsets to player or enemies if that specific object was hit
-        shake_offset = np.random.randint(-2, 3, size=2) if obj.health < prev_health else np.array([0, 0])
-        sx, sy = camera.to_screen(*obj.pos)
-        sx += shake_offset[0]
-        sy += shake_offset[1]
-        draw_x, draw_y = sx, sy
-        rect = pygame.Rect(draw_x, draw_y, TILE_SIZE, TILE_SIZE)
-
-        if obj.type == 'tree':
-            frame = tree_sprite_sheet.get_frame(frame_index)
-            screen.blit(frame, (draw_x, draw_y))
-            if obj.health > 0:
-                pygame.draw.rect(screen, (0, 255, 0), (draw_x, draw_y - 6, TILE_SIZE * (obj.health / 500), 4))
-        elif obj.type == 'ghost':
-            frame = ghost_icon
-            screen.blit(frame, (draw_x, draw_y))
-            if obj.health > 0:
-                pygame.draw.rect(screen, (255, 0, 0), (draw_x, draw_y - 6, TILE_SIZE * (obj.health / 500), 4))
-        elif obj.type in ("loot", "wood"):
-            if obj.type == "wood":
-                screen.blit(wood_icon, (draw_x, draw_y))
-            inventory.handle_pickup(obj, camera, (SCREEN_WIDTH, SCREEN_HEIGHT), {
-                "loot": coin_icon,
-                "wood": wood_icon
-            })
-
-        font = pygame.font.SysFont(None, 16)
-        label_color = (255, 255, 255)
-        label = font.render(f"{obj.type}", True, label_color)
-        screen.blit(label, (draw_x, draw_y - 18))
-        pos_key = tuple(obj.pos)
-
-        if (obj.type == 'ghost' and obj.health <= 0 and pos_key not in death_counters) or \
-           (obj.type == 'tree' and obj.collected and pos_key not in death_counters) or \
-           (obj.type in ('loot', 'wood') and obj.collected and pos_key not in sparkle_counters):
-            continue
-
-        updated_objects.append(obj)
-
-    objects = updated_objects + new_objects
-
-    # Draw player
-    px, py = camera.to_screen(*player_tile)
-    px += shake_offset[0]
-    py += shake_offset[1]
-    player_frame = player_sprite_sheet.get_frame(frame_index)
-    screen.blit(player_frame, (px, py))
-
-    # Lighting Mask
-    light_mask = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    if hand_present:
-        light_mask.fill((0, 0, 0, 200))
-        pygame.draw.circle(light_mask, (0, 0, 0, 0), (px + TILE_SIZE//2, py + TILE_SIZE//2), int(torch_radius * TILE_SIZE))
-    else:
-        light_mask.fill((0, 0, 0, 200))
-    screen.blit(light_mask, (0, 0))
-
-    # Minimap toggleable
-    if show_minimap:
-        fog.draw_minimap(screen, dungeon, TILE_WALL, TILE_FLOOR)
-
-    # Draw inventory at the bottom of the screen
-    inv_surface = inventory.draw()
-    screen.blit(inv_surface, (SCREEN_WIDTH//2 - inv_surface.get_width()//2, SCREEN_HEIGHT - inv_surface.get_height() - 8))
-
-    # Draw current tool icon on the bottom-left corner
-    tool_surface = tool_display.draw()
-    tool_x = 8
-    tool_y = SCREEN_HEIGHT - tool_surface.get_height() - 8
-    screen.blit(tool_surface, (tool_x, tool_y))
-
-    # Draw lantern icon above the tool if hand is detected
-    if hand_present:
-        lantern_surface = pygame.transform.scale(lantern_icon, (tool_surface.get_width(), tool_surface.get_height()))
-        lantern_y = tool_y - lantern_surface.get_height() - 4
-        screen.blit(lantern_surface, (tool_x, lantern_y))
-
-    # Draw player health status
-    bar_width = 200
-    bar_height = 20
-    bar_x = SCREEN_WIDTH - bar_width - 70
-    bar_y = 20
-    health_ratio = player_status["health"] / 100
-
-    # Background bar (gray)
-    pygame.draw.rect(screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
-    # Health fill (green)
-    pygame.draw.rect(screen, (0, 200, 0), (bar_x, bar_y, int(bar_width * health_ratio), bar_height))
-
-    # Health text (red)
-    font = pygame.font.SysFont(None, 20)
-    health_text = font.render(f"{player_status['health']} HP", True, (255, 0, 0))
-    screen.blit(health_text, (bar_x + bar_width + 8, bar_y))
-
-    pygame.display.flip()
-
-    # Save video frame if recording
-    if recording:
-        frame_str = pygame.image.tostring(screen, 'RGB')
-        frame_np = np.frombuffer(frame_str, dtype=np.uint8).reshape((SCREEN_HEIGHT, SCREEN_WIDTH, 3))
-        frame_bgr = cv.cvtColor(frame_np, cv.COLOR_RGB2BGR)
-        out.write(frame_bgr)
-
-        if hand_frame is not None:
-            if hand_out is None:
-                h, w = hand_frame.shape[:2]
-                hand_out = cv.VideoWriter('hand_capture.mp4', fourcc, FPS, (w, h))
-            hand_out.write(hand_frame)
-
-hand_detector.stop()
-out.release()
-if hand_out:
-    hand_out.release()
-pygame.quit()
+        from .hand_detection import HandDetector, ProcessHandDetector  # needs mediapipe; not required headless
+        if args.detector_process:
+            hand_detector = ProcessHandDetector(open_source(args.hand_source))
+        else:
+            adaptive = None
+            if args.adaptive_detection:
+                adaptive = AdaptiveDetection(max_width=args.detection_width, active_fps=args.detection_fps)
+            hand_detector = HandDetector(open_source(args.hand_source), adaptive)
+
+    # Per-stage timings; spans are no-ops unless --profile is given or the overlay is shown
+    profiler = FrameProfiler(enabled=args.profile or bool(args.profile_out), keep_frames=bool(args.profile_out))
+    snapshot = None
+    replay_log = ReplayLog(args.seed, args.map_size) if args.replay_out else None
+    if args.load:
+        start = time.perf_counter()
+        snapshot = load_snapshot(args.load)
+        print(f"Loaded {args.load} (step {snapshot['meta']['step_count']}) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    game = Game(screen, hand_detector, profiler, TextCache(), record_policy=args.record_policy,
+                map_size=args.map_size, dungeon_cache=args.dungeon_cache, dirty_rects=args.dirty_rects,
+                snapshot=snapshot, replay_log=replay_log)
+    autosaver = Autosaver(args.save, args.autosave) if args.save and args.autosave else None
+
+    # --- Main Loop ---
+    # The simulation advances in fixed SIM_DT steps; rendering runs as fast as
+    # --fps allows and interpolates between the last two steps. Headless runs
+    # take --steps-per-frame steps per frame so they're reproducible.
+    frame_times = []
+    accumulator = 0.0
+    last_time = time.perf_counter()
+    frame_count = 0
+    while game.running:
+        if not args.uncapped:
+            clock.tick(args.fps)
+        frame_start = time.perf_counter()
+        profiler.begin_frame()
+
+        with profiler.span("input"):
+            for event in pygame.event.get():
+                game.handle_event(event)
+
+        if args.headless:
+            for _ in range(args.steps_per_frame):
+                for event in hand_detector.advance(game.step_count):
+                    game.handle_event(event)
+                game.update(SIM_DT)
+                if autosaver:
+                    autosaver.step(game)
+            alpha = 1.0
+        else:
+            accumulator += min(frame_start - last_time, MAX_FRAME_TIME)
+            while accumulator >= SIM_DT:
+                game.update(SIM_DT)
+                if autosaver:
+                    autosaver.step(game)
+                accumulator -= SIM_DT
+            alpha = accumulator / SIM_DT
+        last_time = frame_start
+
+        game.render(alpha)
+
+        with profiler.span("flip"):
+            game.present()
+
+        with profiler.span("record"):
+            game.record_frame()
+
+        profiler.end_frame()
+        frame_times.append(time.perf_counter() - frame_start)
+        frame_count += 1
+        if args.frames and frame_count >= args.frames:
+            game.running = False
+
+    if replay_log:
+        replay_log.save(args.replay_out, game.step_count)
+        print(f"Replay log written to {args.replay_out} ({len(replay_log.events)} events, {game.step_count} steps)")
+    if autosaver:
+        autosaver.close()
+    if args.save:
+        start = time.perf_counter()
+        save_snapshot(game, args.save)
+        print(f"Saved {args.save} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    game.close()
+    if args.profile:
+        stats = game.stats()
+        if autosaver:
+            stats["Autosave"] = autosaver.stats()
+        for name, value in stats.items():
+            print(f"{name}: {value}")
+    if args.headless or args.profile:
+        print(f"Frame times: {frame_time_report(frame_times)}")
+        print(f"Simulation steps: {game.step_count}")
+    if args.profile_out:
+        profiler.export(args.profile_out)
+        print(f"Stage timings written to {args.profile_out}")
+    elif args.profile:
+        for name, (mean, p95) in profiler.summary().items():
+            print(f"  {name:<10} mean {mean:6.3f} ms  p95 {p95:6.3f} ms")
+    pygame.quit()
+    return frame_times
+
+
+def map_size(value):
+    width, _, height = value.lower().partition("x")
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Torchlit Dungeon Crawler")
+    parser.add_argument("--headless", action="store_true",
+                        help="run with the SDL dummy video driver and scripted input instead of a window and webcam")
+    parser.add_argument("--seed", type=int, default=None, help="seed np.random for a reproducible dungeon and run")
+    parser.add_argument("--frames", type=int, default=None, help="quit after this many frames")
+    parser.add_argument("--uncapped", action="store_true", help="don't limit the frame rate to --fps")
+    parser.add_argument("--fps", type=int, default=RENDER_FPS,
+                        help=f"render frame rate cap; the simulation always steps at {SIM_FPS} Hz")
+    parser.add_argument("--steps-per-frame", type=int, default=1,
+                        help="simulation steps per rendered frame in --headless mode")
+    parser.add_argument("--script", default=None, help="JSON input script for --headless (default: seeded random walk)")
+    parser.add_argument("--profile", action="store_true", help="time each stage of the frame (toggle the overlay with p)")
+    parser.add_argument("--record-policy", choices=(POLICY_DROP, POLICY_BLOCK), default=POLICY_DROP,
+                        help="when the video encoder falls behind while recording (r): drop frames or wait for it")
+    parser.add_argument("--profile-out", default=None, help="write per-frame stage timings to this .json or .csv file")
+    parser.add_argument("--map-size", type=map_size, default=(MAP_WIDTH, MAP_HEIGHT),
+                        help="map size in tiles as WIDTHxHEIGHT; large maps are generated and streamed in chunks")
+    parser.add_argument("--dungeon-cache", default=None,
+                        help="directory of cached .npz dungeons, keyed by seed, size and generation params "
+                             "(needs --seed)")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="redraw and update only the changed screen regions (full flip when the camera scrolls)")
+    parser.add_argument("--load", default=None, help="resume the run saved in this snapshot (.npz)")
+    parser.add_argument("--save", default=None, help="save a snapshot of the run to this .npz file on exit")
+    parser.add_argument("--autosave", type=int, default=0,
+                        help="also save to --save every this many simulation steps, on a background thread")
+    parser.add_argument("--detector-process", action="store_true",
+                        help="run hand detection in a separate process, fed through shared memory")
+    parser.add_argument("--adaptive-detection", action="store_true",
+                        help="downscale and crop hand detection input to the last hand and lower the inference "
+                             "rate while the hand is still or absent")
+    parser.add_argument("--detection-width", type=int, default=320,
+                        help="with --adaptive-detection, widest image (px) fed to the hand model")
+    parser.add_argument("--detection-fps", type=int, default=15,
+                        help="with --adaptive-detection, inference rate while the hand is moving")
+    parser.add_argument("--replay-out", default=None,
+                        help="log the seed, keys and hand detector output of this run to a replay .json")
+    parser.add_argument("--replay", default=None, help="play a replay log back headless and uncapped")
+    parser.add_argument("--replay-video", default=None,
+                        help="with --replay, render the replay to this video file instead of playing it")
+    parser.add_argument("--workers", type=int, default=None, help="processes for --replay-video (default: all CPUs)")
+    parser.add_argument("--hand-source", default="1",
+                        help="hand camera: camera index, video file, image directory/glob, 'synthetic' or 'null'")
+    args = parser.parse_args(argv)
+    if args.adaptive_detection and args.detector_process:
+        parser.error("--adaptive-detection is only supported by the in-process detector")
+    if args.dungeon_cache and args.seed is None:
+        # Unseeded runs get a new dungeon every time, so nothing would ever be read back
+        parser.error("--dungeon-cache requires --seed")
+    if args.replay_out and args.load:
+        # A replay log starts from the seed, not from a snapshot
+        parser.error("--replay-out cannot be combined with --load")
+    return args
+
+
+def main(argv=None):
+    run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
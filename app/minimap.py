@@ -1,38 +1,95 @@
+from collections import OrderedDict
+
 import numpy as np
 import pygame
 
+from .chunks import ChunkStore, CHUNK_SIZE
+
 class FogOfWar:
-    def __init__(self, map_size, tile_size):
+    # Explored tiles live in a ChunkStore and the minimap is cached as one
+    # surface per chunk, so memory and redraw cost follow what is on screen
+    # rather than the size of the map.
+    def __init__(self, map_size, tile_size, chunk_size=CHUNK_SIZE, max_minimap_chunks=16):
         self.map_size = map_size
         self.tile_size = tile_size
-        self.explored = np.zeros((map_size[1], map_size[0]), dtype=bool)  # shape = (height, width)
-
-    def update(self, player_tile, light_radius):
-        # correct index order: [y, x] for height/width alignment
-        for y in range(self.map_size[1]):
-            for x in range(self.map_size[0]):
-                dx = x - player_tile[0]
-                dy = y - player_tile[1]
-                if dx * dx + dy * dy <= light_radius * light_radius:
-                    self.explored[y, x] = True 
-
-    def draw_minimap(self, screen, dungeon, TILE_WALL, TILE_FLOOR, pos=(10, 10), scale=4):
-        h, w = self.map_size[1], self.map_size[0]
-        tile_colors = np.zeros((h, w, 3), dtype=np.uint8)
+        self.explored = ChunkStore(map_size[0], map_size[1], chunk_size, dtype=bool, fill=False)  # shape = (height, width)
+        self.minimap_chunks = OrderedDict()  # (cx, cy) -> Surface, LRU order
+        self.max_minimap_chunks = max_minimap_chunks
+        self.dirty_chunks = set()  # (cx, cy) revealed since their minimap surface was built
+
+    def update_fov(self, fov):
+        # Reveal only the tiles the torch can actually see (see fov.compute_fov)
+        return self.reveal(fov.x0, fov.y0, fov.visible)
+
+    def reveal(self, x0, y0, mask):
+        # OR a boolean window whose top-left map tile is (x0, y0) into the explored mask
+        w, h = self.map_size
+        mh, mw = mask.shape
+        cx0, cy0 = max(x0, 0), max(y0, 0)
+        cx1, cy1 = min(x0 + mw, w), min(y0 + mh, h)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return False
+
+        mask = mask[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+        region = self.explored[cy0:cy1, cx0:cx1]
+        if not np.any(mask & ~region):
+            return False
+        self.explored.write(cx0, cy0, region | mask)
+        self.dirty_chunks.update(self.explored.chunks_in(cx0, cy0, cx1, cy1))
+        return True
 
-        # Transpose dungeon tiles to match minimap shape (h, w)
-        tiles = dungeon.tiles  # (h, w)
+    def minimap_chunk(self, cx, cy, dungeon, TILE_WALL, TILE_FLOOR, scale):
+        # Minimap surface for one chunk, rebuilt only after fog revealed something in it
+        key = (cx, cy)
+        cs = self.explored.chunk_size
+        x0, y0 = cx * cs, cy * cs
+        w, h = min(cs, self.map_size[0] - x0), min(cs, self.map_size[1] - y0)
+        surf = self.minimap_chunks.get(key)
+        if surf is not None:
+            self.minimap_chunks.move_to_end(key)
+            if key not in self.dirty_chunks and surf.get_size() == (w * scale, h * scale):
+                return surf
+
+        tiles = dungeon.tiles[y0:y0 + h, x0:x0 + w]  # (h, w)
+        tile_colors = np.zeros((h, w, 3), dtype=np.uint8)
         tile_colors[tiles == TILE_WALL] = (40, 40, 40)
         tile_colors[tiles == TILE_FLOOR] = (150, 150, 150)
 
         # Apply explored mask (broadcasted to 3 channels)
-        mask = np.expand_dims(self.explored, axis=-1)
+        mask = np.expand_dims(self.explored.chunk(cx, cy)[:h, :w], axis=-1)
         tile_colors = tile_colors * mask
 
-        # Upscale by repeating pixels 
+        # Upscale by repeating pixels
         scaled = np.repeat(np.repeat(tile_colors, scale, axis=0), scale, axis=1)
 
-        # Draw to pygame
-        surf = pygame.Surface((w * scale, h * scale))
+        if surf is None or surf.get_size() != (w * scale, h * scale):
+            surf = pygame.Surface((w * scale, h * scale))
+            self.minimap_chunks[key] = surf
+            while len(self.minimap_chunks) > self.max_minimap_chunks:
+                self.minimap_chunks.popitem(last=False)
         pygame.surfarray.blit_array(surf, scaled.swapaxes(0, 1))
-        screen.blit(surf, pos)
+        self.dirty_chunks.discard(key)
+        return surf
+
+    def minimap_view(self, center=None, view_tiles=(60, 45)):
+        # Tile window (x0, y0, w, h) the minimap shows around `center`
+        w, h = self.map_size
+        vw, vh = min(view_tiles[0], w), min(view_tiles[1], h)
+        if center is None:
+            center = (w // 2, h // 2)
+        x0 = max(0, min(int(center[0]) - vw // 2, w - vw))
+        y0 = max(0, min(int(center[1]) - vh // 2, h - vh))
+        return x0, y0, vw, vh
+
+    def draw_minimap(self, screen, dungeon, TILE_WALL, TILE_FLOOR, pos=(10, 10), scale=4, center=None, view_tiles=(60, 45)):
+        # Shows at most view_tiles of the map around `center` (the whole map if it fits),
+        # stitched from cached per-chunk surfaces
+        x0, y0, vw, vh = self.minimap_view(center, view_tiles)
+
+        cs = self.explored.chunk_size
+        clip = screen.get_clip()
+        screen.set_clip(pygame.Rect(pos[0], pos[1], vw * scale, vh * scale).clip(clip))
+        for cx, cy in self.explored.chunks_in(x0, y0, x0 + vw, y0 + vh):
+            surf = self.minimap_chunk(cx, cy, dungeon, TILE_WALL, TILE_FLOOR, scale)
+            screen.blit(surf, (pos[0] + (cx * cs - x0) * scale, pos[1] + (cy * cs - y0) * scale))
+        screen.set_clip(clip)
@@ -0,0 +1,133 @@
+# profiler.py
+import csv
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    # Reusable timer for one named stage; time from repeated entries within a frame adds up.
+    # Spans record self time: time spent in spans nested inside this one is left out.
+    __slots__ = ('profiler', 'name', 'start', 'nested')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+        self.nested = 0.0
+
+    def __enter__(self):
+        self.profiler.open_spans.append(self)
+        self.nested = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        open_spans = self.profiler.open_spans
+        open_spans.pop()
+        if open_spans:
+            open_spans[-1].nested += elapsed
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed - self.nested
+        return False
+
+
+class FrameProfiler:
+    # Per-stage frame timings. Wrap each stage in `with profiler.span(name):`
+    # and call begin_frame()/end_frame() around the loop body; nested spans
+    # are subtracted from the enclosing one, so stages never count time twice.
+    # When disabled, span() hands back a shared no-op context manager.
+    def __init__(self, enabled=False, history=120, keep_frames=False):
+        self.enabled = enabled
+        self.history = history
+        self.keep_frames = keep_frames  # keep every frame for export, not just the rolling window
+        self.spans = {}
+        self.stages = []  # stage names in first-seen order
+        self.samples = {}  # name -> deque of ms over the last `history` frames
+        self.frames = []
+        self.current = {}
+        self.open_spans = []  # spans entered and not yet exited, innermost last
+        self.frame_start = 0.0
+        self.frame_number = 0
+        self.overlay_lines = []
+        self.overlay_bars = []  # per overlay line: bar heights of the stage's rolling histogram
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        span = self.spans.get(name)
+        if span is None:
+            span = _Span(self, name)
+            self.spans[name] = span
+        return span
+
+    def begin_frame(self):
+        # Always stamped, so enabling the profiler mid-frame still yields a sane frame time
+        self.current = {}
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.current["frame"] = (time.perf_counter() - self.frame_start) * 1000
+        for name, ms in self.current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = deque(maxlen=self.history)
+                self.samples[name] = samples
+                self.stages.append(name)
+            samples.append(ms)
+        if self.keep_frames:
+            self.frames.append(dict(self.current, frame_number=self.frame_number))
+        self.frame_number += 1
+
+    def summary(self):
+        # name -> (mean ms, p95 ms) over the rolling window
+        out = {}
+        for name in self.stages:
+            values = np.fromiter(self.samples[name], dtype=np.float64)
+            out[name] = (float(values.mean()), float(np.percentile(values, 95)))
+        return out
+
+    def histogram(self, name, bins=10):
+        # Rolling histogram of one stage: (counts, bin edges in ms)
+        return np.histogram(np.fromiter(self.samples.get(name, ()), dtype=np.float64), bins=bins)
+
+    def draw_overlay(self, screen, text_cache, pos=(10, 200), size=16, color=(255, 255, 0), refresh_every=15,
+                     bins=10, bar_width=3):
+        # One line per stage: mean and p95, then a histogram of the rolling window
+        # (min to max ms, tallest bin `size` - 2 px high). Text and bars are rebuilt
+        # every `refresh_every` frames so the text cache isn't flooded.
+        if self.frame_number % refresh_every == 0 or not self.overlay_lines:
+            self.overlay_lines = [f"{name:<10} {mean:5.1f} ms  p95 {p95:5.1f}"
+                                  for name, (mean, p95) in self.summary().items()]
+            self.overlay_bars = []
+            for name in self.stages:
+                counts, _ = self.histogram(name, bins)
+                self.overlay_bars.append((counts * (size - 2) / max(counts.max(), 1)).astype(int).tolist())
+        x, y = pos
+        labels = [text_cache.render(line, size, color) for line in self.overlay_lines]
+        bars_x = x + max((label.get_width() for label in labels), default=0) + 8
+        for label, bars in zip(labels, self.overlay_bars):
+            screen.blit(label, (x, y))
+            for i, height in enumerate(bars):
+                if height:
+                    screen.fill(color, (bars_x + i * bar_width, y + size - 1 - height, bar_width - 1, height))
+            y += size
+
+    def export(self, path):
+        stages = list(self.stages)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["frame_number"] + stages, restval=0.0)
+                writer.writeheader()
+                writer.writerows(self.frames)
+        else:
+            with open(path, "w") as f:
+                json.dump({"stages": stages, "frames": self.frames}, f)
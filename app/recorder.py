@@ -0,0 +1,113 @@
+# recorder.py
+import queue
+import sys
+import threading
+
+import cv2 as cv
+import numpy as np
+import pygame
+
+POLICY_DROP = 'drop'  # drop the new frame when the encoder is behind
+POLICY_BLOCK = 'block'  # wait for the encoder to free a buffer
+
+
+class VideoRecorder:
+    # Encodes frames on a worker thread. Frames are copied once into a fixed
+    # pool of BGR buffers, so memory is bounded by `max_queue` frames and the
+    # render loop never waits on VideoWriter.write (unless policy is 'block').
+    def __init__(self, path, fps, max_queue=16, policy=POLICY_DROP, fourcc='mp4v'):
+        if policy not in (POLICY_DROP, POLICY_BLOCK):
+            raise ValueError(f"Unknown recorder policy: {policy}")
+        self.path = path
+        self.fps = fps
+        self.max_queue = max_queue
+        self.policy = policy
+        self.fourcc = cv.VideoWriter_fourcc(*fourcc)
+
+        self.frames = queue.Queue()
+        self.free_buffers = queue.Queue()
+        self.frame_shape = None
+        self.writer = None
+        self.thread = None
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+
+    def _start(self, shape):
+        h, w = shape[:2]
+        self.frame_shape = shape
+        for _ in range(self.max_queue):
+            self.free_buffers.put(np.empty(shape, dtype=np.uint8))
+        self.writer = cv.VideoWriter(self.path, self.fourcc, self.fps, (w, h))
+        self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.thread.start()
+
+    def _encode_loop(self):
+        while True:
+            buf = self.frames.get()
+            if buf is None:
+                break
+            self.writer.write(buf)
+            self.written += 1
+            self.free_buffers.put(buf)
+
+    def _acquire_buffer(self, shape):
+        if self.thread is None:
+            self._start(shape)
+        elif shape != self.frame_shape:
+            raise ValueError(f"Frame shape changed from {self.frame_shape} to {shape}")
+
+        self.submitted += 1
+        try:
+            if self.policy == POLICY_BLOCK:
+                return self.free_buffers.get()
+            return self.free_buffers.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return None
+
+    def write_surface(self, surface):
+        # Copies a pygame surface into a BGR (h, w, 3) buffer in a single pass
+        w, h = surface.get_size()
+        buf = self._acquire_buffer((h, w, 3))
+        if buf is None:
+            return False
+        if surface.get_bitsize() == 32 and surface.get_shifts()[:3] == (16, 8, 0) and sys.byteorder == 'little':
+            # XRGB pixels are already B, G, R, X bytes in memory; just drop the 4th byte
+            pixels = pygame.surfarray.pixels2d(surface)  # (w, h) view, no copy
+            bgra = pixels.T.view(np.uint8).reshape(h, w, 4)
+            cv.cvtColor(bgra, cv.COLOR_BGRA2BGR, dst=buf)
+            del bgra
+        else:
+            pixels = pygame.surfarray.pixels3d(surface)
+            np.copyto(buf, pixels.transpose(1, 0, 2)[:, :, ::-1])
+        del pixels  # unlock the surface
+        self.frames.put(buf)
+        return True
+
+    def write_array(self, frame):
+        # Frame is an OpenCV-style BGR (h, w, 3) uint8 array
+        buf = self._acquire_buffer(frame.shape)
+        if buf is None:
+            return False
+        np.copyto(buf, frame)
+        self.frames.put(buf)
+        return True
+
+    def stats(self):
+        return {
+            "queue_depth": self.frames.qsize(),
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.frames.put(None)
+        self.thread.join()
+        self.writer.release()
+        self.thread = None
+        self.free_buffers = queue.Queue()
@@ -0,0 +1,125 @@
+# replay.py
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2 as cv
+import numpy as np
+import pygame
+
+from .headless import ScriptedInput, use_dummy_video_driver
+from .recorder import VideoRecorder, POLICY_BLOCK
+
+REPLAY_VERSION = 1
+REPLAY_KEYS = ("w", "a", "s", "d", "m")  # keys that change the simulation or what is drawn
+
+
+class ReplayLog:
+    # Records what a run can't recompute from its seed: key presses and changes
+    # of the hand detector output, each tagged with the simulation step it
+    # applies before. The file is a headless input script ({"events": [...]})
+    # plus the seed and map size, so --replay (or --script) plays it back.
+    def __init__(self, seed, map_size):
+        self.seed = int(seed)
+        self.map_size = tuple(map_size)
+        self.events = []
+        self.hand = None  # last logged (detected, peace)
+        self.steps = 0
+
+    def key(self, step, name):
+        if name in REPLAY_KEYS:
+            self.events.append({"step": step, "keys": [name]})
+
+    def hand_state(self, step, detected, peace):
+        state = (bool(detected), bool(peace))
+        if state != self.hand:
+            self.hand = state
+            self.events.append({"step": step, "hand": state[0], "peace": state[1]})
+
+    def save(self, path, steps):
+        self.steps = steps
+        with open(path, "w") as f:
+            json.dump({"version": REPLAY_VERSION, "seed": self.seed, "map_size": list(self.map_size),
+                       "steps": steps, "events": self.events}, f, separators=(",", ":"))
+        return path
+
+
+def load_replay(path):
+    with open(path) as f:
+        log = json.load(f)
+    if log.get("version") != REPLAY_VERSION:
+        raise ValueError(f"{path}: replay version {log.get('version')}, expected {REPLAY_VERSION}")
+    return log
+
+
+def new_game(log):
+    # Fresh headless Game in the state the logged run started from. The seed is
+    # set first, exactly as main.run does, since the dungeon draws from np.random.
+    from .game import Game, SCREEN_WIDTH, SCREEN_HEIGHT
+    use_dummy_video_driver()
+    np.random.seed(log["seed"])
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    hand_input = ScriptedInput(log["events"])
+    return Game(screen, hand_input, map_size=tuple(log["map_size"])), hand_input
+
+
+def step(game, hand_input):
+    for event in hand_input.advance(game.step_count):
+        game.handle_event(event)
+    game.update()
+
+
+def _render_segment(job):
+    # Worker: simulates up to `start` without drawing (rendering never touches
+    # the RNG), then renders steps [start, stop) into a lossless segment file
+    log, start, stop, path, fps = job
+    game, hand_input = new_game(log)
+    while game.step_count < start:
+        step(game, hand_input)
+    recorder = VideoRecorder(path, fps, policy=POLICY_BLOCK, fourcc='FFV1')
+    while game.step_count < stop:
+        step(game, hand_input)
+        game.render(1.0)
+        recorder.write_surface(game.screen)
+    recorder.close()
+    game.hand_detector.stop()
+    pygame.quit()
+    return path, recorder.written
+
+
+def render_video(log, out_path, workers=None, fps=None, fourcc='mp4v'):
+    # Renders a replay log to video offline, one frame per simulation step. The
+    # step range is split into one segment per worker; segments are rendered in
+    # parallel as FFV1 and joined into `out_path` with a single lossy encode.
+    from .game import SIM_FPS
+    fps = fps or SIM_FPS
+    steps = int(log["steps"])
+    workers = max(1, min(workers or os.cpu_count() or 1, steps))
+    bounds = np.linspace(0, steps, workers + 1).astype(int).tolist()
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = [(log, start, stop, os.path.join(tmp, f"segment_{i:03d}.avi"), fps)
+                for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])) if stop > start]
+        if len(jobs) == 1:
+            segments = [_render_segment(jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+                segments = list(pool.map(_render_segment, jobs))
+
+        writer = None
+        written = 0
+        for path, _ in segments:
+            capture = cv.VideoCapture(path)
+            ok, frame = capture.read()
+            while ok:
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    writer = cv.VideoWriter(out_path, cv.VideoWriter_fourcc(*fourcc), fps, (w, h))
+                writer.write(frame)
+                written += 1
+                ok, frame = capture.read()
+            capture.release()
+        if writer is not None:
+            writer.release()
+    return written
@@ -0,0 +1,252 @@
+# snapshot.py
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .dungeon import Dungeon, ChunkedDungeon
+from .entities import COLUMNS
+
+SNAPSHOT_VERSION = 1
+AUTOSAVE_STEPS = 900  # one minute of simulation at 15 steps per second
+
+# A snapshot is one uncompressed .npz of flat arrays:
+#   meta          JSON string: version, map size, player, tool and timer state, np.random position
+#   tiles         dense maps: (h, w) uint8
+#   tile_keys     chunked maps: (K, 2) chunk coords in generation order, with
+#   tile_chunks   (K, cs, cs) uint8 tiles and
+#   room_counts   (K,) rooms per chunk
+#   rooms         (n, 4) int32 (x, y, w, h), in dungeon.rooms order
+#   fog_keys      (F, 2) explored chunk coords and
+#   fog_bits      (F, cs * cs / 8) np.packbits of each chunk's explored mask
+#   entity_*      one column per EntityStore array (see entities.COLUMNS), dead slots included
+#   free_slots    EntityStore slots waiting to be reused
+#   rng_keys      np.random MT19937 key
+# Effects, particles, pickup fly-ins and recordings are not saved.
+
+
+def capture(game):
+    # Copies everything a snapshot needs. Runs on the frame thread and only copies;
+    # packing and compression happen in encode(), which can run on another thread.
+    dungeon = game.dungeon
+    rng_name, rng_keys, rng_pos, has_gauss, cached_gauss = np.random.get_state()
+    state = {
+        "meta": {
+            "version": SNAPSHOT_VERSION,
+            "map_size": [game.map_width, game.map_height],
+            "chunked": game.chunked,
+            "seed": int(dungeon.seed),
+            "step_count": game.step_count,
+            "time": game.time,
+            "frame_index": game.frame_index,
+            "player_tile": game.player_tile.tolist(),
+            "target_tile": game.target_tile.tolist(),
+            "player_status": dict(game.player_status),
+            "tool_toggle_state": bool(game.tool_toggle_state),
+            "last_toggle_time": game.last_toggle_time,
+            "prev_hand_piece": bool(game.prev_hand_piece),
+            "flicker_angle": float(game.flicker_angle),
+            "spawned_rooms": game.spawned_rooms,
+            "next_id": game.entities.next_id,
+            "inventory": game.inventory.item_keys,
+            "rng": [rng_name, int(rng_pos), int(has_gauss), float(cached_gauss)],
+        },
+        "rooms": np.asarray(dungeon.rooms, dtype=np.int32).reshape(-1, 4),
+        "fog": game.fog.explored.export(),
+        "entities": game.entities.columns(),
+        "free_slots": np.asarray(game.entities.free_slots, dtype=np.int32),
+        "rng_keys": rng_keys.copy(),
+    }
+    if game.chunked:
+        state["meta"]["params"] = [dungeon.tiles.chunk_size, dungeon.room_attempts, dungeon.min_size, dungeon.max_size]
+        state["tile_order"] = list(dungeon.chunk_rooms)
+        state["room_counts"] = np.array([len(rooms) for rooms in dungeon.chunk_rooms.values()], dtype=np.int32)
+        state["tiles"] = dungeon.tiles.export()
+    else:
+        state["meta"]["params"] = list(dungeon.params)
+        state["tiles"] = dungeon.tiles.copy()
+    return state
+
+
+def encode(state, fog_store, tile_store=None):
+    # capture() output -> dict of arrays for np.savez. The stores are only used
+    # for their chunk layout and to decode compressed chunks.
+    arrays = {
+        "meta": np.array(json.dumps(state["meta"])),
+        "rooms": state["rooms"],
+        "free_slots": state["free_slots"],
+        "rng_keys": state["rng_keys"],
+    }
+    if tile_store is not None:
+        keys, values = tile_store.stack_chunks({key: state["tiles"][key] for key in state["tile_order"]})
+        arrays["tile_keys"] = keys
+        arrays["tile_chunks"] = values
+        arrays["room_counts"] = state["room_counts"]
+    else:
+        arrays["tiles"] = state["tiles"]
+
+    fog_keys, fog = fog_store.stack_chunks(state["fog"])
+    arrays["fog_keys"] = fog_keys
+    arrays["fog_bits"] = np.packbits(fog.reshape(len(fog), fog_store.chunk_size ** 2), axis=1)
+    for name, column in state["entities"].items():
+        arrays["entity_" + name] = column
+    return arrays
+
+
+def write(path, arrays):
+    # Written to a temp file and renamed, so a crash mid-save never leaves a broken snapshot
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+    return path
+
+
+def save_snapshot(game, path):
+    return write(path, encode(capture(game), game.fog.explored, game.dungeon.tiles if game.chunked else None))
+
+
+def load_snapshot(path):
+    # Reads every array into memory; pass the result to Game(snapshot=...)
+    with np.load(path) as data:
+        snapshot = {name: data[name] for name in data.files}
+    snapshot["meta"] = json.loads(str(snapshot["meta"]))
+    if snapshot["meta"]["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"{path}: snapshot version {snapshot['meta']['version']}, expected {SNAPSHOT_VERSION}")
+    return snapshot
+
+
+def build_dungeon(snapshot):
+    # The saved dungeon, without generating anything
+    meta = snapshot["meta"]
+    width, height = meta["map_size"]
+    rooms = [tuple(room) for room in snapshot["rooms"].tolist()]
+    if meta["chunked"]:
+        chunk_size, room_attempts, min_size, max_size = meta["params"]
+        dungeon = ChunkedDungeon(width, height, meta["seed"], chunk_size, room_attempts=room_attempts,
+                                 min_size=min_size, max_size=max_size, generate=False)
+        keys = snapshot["tile_keys"]
+        dungeon.tiles.load_chunks(keys, snapshot["tile_chunks"])
+        ends = np.cumsum(snapshot["room_counts"]).tolist()
+        for (cx, cy), start, end in zip(keys.tolist(), [0] + ends[:-1], ends):
+            dungeon.chunk_rooms[(cx, cy)] = rooms[start:end]
+        dungeon.rooms = rooms
+    else:
+        dungeon = Dungeon(width, height, meta["seed"], *meta["params"], generate=False)
+        dungeon.tiles = snapshot["tiles"].astype(np.uint8, copy=False)
+        dungeon.rooms = rooms
+    return dungeon
+
+
+def restore(game, snapshot):
+    # Applies everything but the dungeon (see build_dungeon) to a freshly built Game
+    meta = snapshot["meta"]
+    game.step_count = meta["step_count"]
+    game.time = game.render_time = meta["time"]
+    game.frame_index = meta["frame_index"]
+    game.player_tile = np.array(meta["player_tile"])
+    game.prev_player_tile = game.player_tile.copy()
+    game.target_tile = np.array(meta["target_tile"])
+    game.player_status = dict(meta["player_status"])
+    game.tool_toggle_state = meta["tool_toggle_state"]
+    game.tool_selected = 'bow' if game.tool_toggle_state else 'axe'
+    game.tool_display.set_tool(game.bow_icon if game.tool_toggle_state else game.axe_icon)
+    game.last_toggle_time = meta["last_toggle_time"]
+    game.prev_hand_piece = meta["prev_hand_piece"]
+    game.flicker_angle = meta["flicker_angle"]
+    game.spawned_rooms = meta["spawned_rooms"]
+    game.camera.center_on(*game.player_tile)
+    game.prev_camera = (game.camera.x, game.camera.y)
+
+    fog = game.fog.explored
+    cs = fog.chunk_size
+    bits = np.unpackbits(snapshot["fog_bits"], axis=1, count=cs * cs).view(bool)
+    fog.load_chunks(snapshot["fog_keys"], bits.reshape(-1, cs, cs))
+    game.fog.minimap_chunks.clear()
+    game.fog.dirty_chunks.clear()
+
+    entities = game.entities
+    entities.load_columns({name: snapshot["entity_" + name] for name in COLUMNS}, meta["next_id"],
+                          snapshot["free_slots"])
+    for eid in entities.slot_of:
+        game.objects.insert(entities.view(eid))
+
+    for i, key in enumerate(meta["inventory"]):
+        if key is not None:
+            game.inventory.set_item(i, game.item_icons[key], key)
+
+    rng_name, rng_pos, has_gauss, cached_gauss = meta["rng"]
+    np.random.set_state((rng_name, snapshot["rng_keys"], rng_pos, has_gauss, cached_gauss))
+    game.full_redraw = True
+
+
+class Autosaver:
+    # Saves a snapshot every `interval` simulation steps. The frame thread only
+    # copies state (capture); packing and writing run on a worker thread. While
+    # a save is still being written, new ones are skipped rather than queued.
+    def __init__(self, path, interval=AUTOSAVE_STEPS):
+        self.path = path
+        self.interval = interval
+        self.jobs = queue.Queue()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.thread = None
+        self.last_step = None
+
+        self.saved = 0
+        self.skipped = 0
+        self.capture_ms = 0.0
+        self.write_ms = 0.0
+
+    def _save_loop(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            start = time.perf_counter()
+            write(self.path, encode(*job))
+            self.write_ms += (time.perf_counter() - start) * 1000
+            self.saved += 1
+            self.idle.set()
+
+    def step(self, game):
+        # Call after every simulation step
+        if game.step_count % self.interval or game.step_count == self.last_step:
+            return False
+        return self.save(game)
+
+    def save(self, game):
+        if not self.idle.is_set():
+            self.skipped += 1
+            return False
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._save_loop, daemon=True)
+            self.thread.start()
+        start = time.perf_counter()
+        job = (capture(game), game.fog.explored, game.dungeon.tiles if game.chunked else None)
+        self.capture_ms += (time.perf_counter() - start) * 1000
+        self.last_step = game.step_count
+        self.idle.clear()
+        self.jobs.put(job)
+        return True
+
+    def stats(self):
+        return {
+            "saved": self.saved,
+            "skipped": self.skipped,
+            "capture_ms": round(self.capture_ms, 3),
+            "write_ms": round(self.write_ms, 3),
+        }
+
+    def close(self):
+        # Finishes the save in flight, if any
+        if self.thread is None:
+            return
+        self.jobs.put(None)
+        self.thread.join()
+        self.thread = None
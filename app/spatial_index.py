@@ -0,0 +1,63 @@
+# spatial_index.py
+
+
+class SpatialHash:
+    # Uniform grid over tile positions. Buckets are insertion-ordered dicts so
+    # query results come back in a stable order from run to run.
+    def __init__(self, cell_size=8):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> {obj: None}
+        self.obj_cells = {}  # obj -> (cx, cy) it is currently stored under
+
+    def __len__(self):
+        return len(self.obj_cells)
+
+    def __iter__(self):
+        return iter(list(self.obj_cells))
+
+    def __contains__(self, obj):
+        return obj in self.obj_cells
+
+    def cell_of(self, pos):
+        return int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size
+
+    def insert(self, obj):
+        cell = self.cell_of(obj.pos)
+        self.cells.setdefault(cell, {})[obj] = None
+        self.obj_cells[obj] = cell
+
+    def remove(self, obj):
+        cell = self.obj_cells.pop(obj, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        bucket.pop(obj, None)
+        if not bucket:
+            del self.cells[cell]
+
+    def update(self, obj):
+        # Re-bucket obj after its position changed; cheap when it stays in the same cell
+        old_cell = self.obj_cells.get(obj)
+        if old_cell == self.cell_of(obj.pos):
+            return
+        self.remove(obj)
+        self.insert(obj)
+
+    def _cells_in(self, x0, y0, x1, y1):
+        # Yields buckets overlapping the inclusive tile range
+        cs = self.cell_size
+        for cy in range(int(y0) // cs, int(y1) // cs + 1):
+            for cx in range(int(x0) // cs, int(x1) // cs + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    yield bucket
+
+    def query_rect(self, x, y, w, h):
+        # Objects whose tile lies in [x, x + w) x [y, y + h)
+        found = []
+        for bucket in self._cells_in(x, y, x + w - 1, y + h - 1):
+            for obj in bucket:
+                ox, oy = obj.pos[0], obj.pos[1]
+                if x <= ox < x + w and y <= oy < y + h:
+                    found.append(obj)
+        return found
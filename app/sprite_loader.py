@@ -1,8 +1,9 @@
 import pygame
 
 class SpriteSheet:
-    def __init__(self, image_path, frame_width, frame_height):
-        self.sheet = pygame.image.load(image_path).convert_alpha()
+    def __init__(self, image_path, frame_width, frame_height, sheet=None):
+        # `sheet` takes an already loaded surface (e.g. an AssetManager atlas image) instead of a path
+        self.sheet = sheet if sheet is not None else pygame.image.load(image_path).convert_alpha()
         self.frame_width = frame_width
         self.frame_height = frame_height
         self.frames = self.load_frames()
@@ -0,0 +1,54 @@
+# text_cache.py
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    # Loads each font size once and memoizes rendered text surfaces by
+    # (text, size, color) with LRU eviction.
+    def __init__(self, max_entries=256, font_name=None):
+        self.max_entries = max_entries
+        self.font_name = font_name
+        self.fonts = {}  # size -> Font
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.SysFont(self.font_name, size)
+            self.fonts[size] = font
+        return font
+
+    def render(self, text, size, color, antialias=True):
+        key = (text, size, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.get_font(size).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.surfaces),
+            "fonts": len(self.fonts),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self.surfaces.clear()
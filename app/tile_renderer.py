@@ -0,0 +1,88 @@
+# tile_renderer.py
+from collections import OrderedDict
+
+import pygame
+
+from .dungeon import TILE_WALL
+
+COLOR_WALL = (40, 40, 40)
+COLOR_FLOOR = (150, 150, 150)
+
+
+class TileRenderer:
+    # Pre-renders dungeon tiles into chunk surfaces once and blits only the
+    # chunks overlapping the camera viewport each frame. At most `max_chunks`
+    # surfaces are kept; the least recently drawn ones are dropped.
+    def __init__(self, dungeon, tile_size, chunk_tiles=16, wall_color=COLOR_WALL, floor_color=COLOR_FLOOR, max_chunks=48):
+        self.dungeon = dungeon
+        self.tile_size = tile_size
+        self.chunk_tiles = chunk_tiles
+        self.wall_color = wall_color
+        self.floor_color = floor_color
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (cx, cy) -> Surface, LRU order
+        self.dirty = set()  # chunk keys that must be redrawn before next blit
+
+    def _render_chunk(self, cx, cy):
+        ct, ts = self.chunk_tiles, self.tile_size
+        x0, y0 = cx * ct, cy * ct
+        # One window read; works for a dense array and for a ChunkStore
+        tiles = self.dungeon.tiles[y0:y0 + ct, x0:x0 + ct]
+
+        surf = self.chunks.get((cx, cy))
+        if surf is None:
+            surf = pygame.Surface((ct * ts, ct * ts))
+            self.chunks[(cx, cy)] = surf
+            while len(self.chunks) > self.max_chunks:
+                key, _ = self.chunks.popitem(last=False)
+                self.dirty.discard(key)
+
+        # Chunks on the map border are partially empty; keep that area black
+        surf.fill((0, 0, 0))
+        for y in range(tiles.shape[0]):
+            for x in range(tiles.shape[1]):
+                color = self.wall_color if tiles[y, x] == TILE_WALL else self.floor_color
+                surf.fill(color, (x * ts, y * ts, ts, ts))
+        return surf
+
+    def invalidate(self, x, y, w=1, h=1):
+        # Mark every chunk touched by the tile rect (x, y, w, h) for redraw
+        ct = self.chunk_tiles
+        for cy in range(y // ct, (y + h - 1) // ct + 1):
+            for cx in range(x // ct, (x + w - 1) // ct + 1):
+                if (cx, cy) in self.chunks:
+                    self.dirty.add((cx, cy))
+
+    def invalidate_all(self):
+        self.dirty.update(self.chunks.keys())
+
+    def get_chunk(self, cx, cy):
+        key = (cx, cy)
+        if key not in self.chunks or key in self.dirty:
+            self.dirty.discard(key)
+            return self._render_chunk(cx, cy)
+        self.chunks.move_to_end(key)
+        return self.chunks[key]
+
+    def draw(self, screen, camera, offset=(0, 0)):
+        ct, ts = self.chunk_tiles, self.tile_size
+        height, width = self.dungeon.tiles.shape
+
+        # Only the tiles the camera covers are visible, matching the old per-tile loop
+        x0, y0 = max(camera.x, 0), max(camera.y, 0)
+        x1 = min(camera.x + camera.tiles_wide, width)
+        y1 = min(camera.y + camera.tiles_high, height)
+        if x1 <= x0 or y1 <= y0:
+            return
+
+        view_x, view_y = camera.to_screen(x0, y0)
+        view = pygame.Rect(view_x + offset[0], view_y + offset[1], (x1 - x0) * ts, (y1 - y0) * ts)
+        clip = screen.get_clip()
+        screen.set_clip(view.clip(clip))
+
+        for cy in range(y0 // ct, (y1 - 1) // ct + 1):
+            for cx in range(x0 // ct, (x1 - 1) // ct + 1):
+                sx, sy = camera.to_screen(cx * ct, cy * ct)
+                screen.blit(self.get_chunk(cx, cy), (sx + offset[0], sy + offset[1]))
+
+        screen.set_clip(clip)
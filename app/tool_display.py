@@ -2,15 +2,23 @@
 import pygame
 
 class ToolDisplay:
-    def __init__(self, box_size=48):
+    def __init__(self, box_size=48, assets=None):
         self.box_size = box_size
+        self.scale = assets.scale if assets is not None else pygame.transform.scale  # memoized with an AssetManager
         self.surface = pygame.Surface((box_size, box_size), pygame.SRCALPHA)
         self.current_tool = None
+        self.dirty = True  # redrawn only after set_tool
 
     def set_tool(self, tool_image):
-        self.current_tool = pygame.transform.scale(tool_image, (self.box_size, self.box_size))
+        tool = self.scale(tool_image, (self.box_size, self.box_size))
+        if tool is not self.current_tool:
+            self.current_tool = tool
+            self.dirty = True
 
     def draw(self):
+        if not self.dirty:
+            return self.surface
+        self.dirty = False
         self.surface.fill((0, 0, 0, 0))  # Clear previous frame
         rect = pygame.Rect(0, 0, self.box_size, self.box_size)
         pygame.draw.rect(self.surface, (255, 255, 255), rect, 2)  # Outline
@@ -0,0 +1,58 @@
+# bench_dirty_rects.py
+# Frame time of full redraw + flip vs dirty-rect redraw + display.update, in an
+# idle scene (standing still, torch off), an idle scene with the torch
+# flickering, and an active scripted walk. Run from the repo root:
+# python -m benchmarks.bench_dirty_rects
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from app.game import Game, SCREEN_WIDTH, SCREEN_HEIGHT
+from app.headless import ScriptedInput, random_script
+
+FRAMES = 600
+SCENES = {
+    "idle": [{"step": 0, "hand": False}],
+    "idle, torch on": [{"step": 0, "hand": True}],
+    "active walk": random_script(FRAMES, seed=3),
+}
+
+
+def run(screen, script, dirty_rects):
+    np.random.seed(3)
+    hand_input = ScriptedInput(script)
+    game = Game(screen, hand_input, dirty_rects=dirty_rects)
+    times = []
+    area = []
+    for _ in range(FRAMES):
+        for event in hand_input.advance(game.step_count):
+            game.handle_event(event)
+        game.update()
+        start = time.perf_counter()
+        game.render(1.0)
+        game.present()
+        times.append(time.perf_counter() - start)
+        rects = game.update_rects
+        area.append(1.0 if rects is None else sum(r.w * r.h for r in rects) / (SCREEN_WIDTH * SCREEN_HEIGHT))
+    game.hand_detector.stop()
+    times = np.array(times[10:]) * 1000  # skip warm-up
+    return times.mean(), np.percentile(times, 95), np.mean(area[10:])
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    for name, script in SCENES.items():
+        full = run(screen, script, False)
+        dirty = run(screen, script, True)
+        print(f"{name:<16} full  mean {full[0]:6.3f} ms  p95 {full[1]:6.3f} ms   "
+              f"dirty  mean {dirty[0]:6.3f} ms  p95 {dirty[1]:6.3f} ms  ({dirty[2]:.0%} of screen updated)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
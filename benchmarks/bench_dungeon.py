@@ -0,0 +1,74 @@
+# bench_dungeon.py
+# Compares the old np.random, tile-by-tile Dungeon.generate with the Generator/
+# slice-carving version, the .npz cache and the process-pool batch API.
+# Run from the repo root: python -m benchmarks.bench_dungeon
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.dungeon import Dungeon, generate_batch, TILE_WALL, TILE_FLOOR
+
+SIZES = [(60, 45), (200, 150), (500, 400)]
+BATCH = 64
+
+
+def old_generate(width, height, room_attempts=20, min_size=6, max_size=12):
+    tiles = np.full((height, width), TILE_WALL, dtype=np.uint8)
+    rooms = []
+    for _ in range(room_attempts):
+        w = np.random.randint(min_size, max_size + 1)
+        h = np.random.randint(min_size, max_size + 1)
+        x = np.random.randint(1, width - w - 1)
+        y = np.random.randint(1, height - h - 1)
+        if any(x <= rx + rw and x + w >= rx and y <= ry + rh and y + h >= ry for rx, ry, rw, rh in rooms):
+            continue
+        tiles[y:y+h, x:x+w] = TILE_FLOOR
+        if rooms:
+            rx, ry, rw, rh = rooms[-1]
+            x1, y1, x2, y2 = rx + rw // 2, ry + rh // 2, x + w // 2, y + h // 2
+            if np.random.random() < 0.5:
+                for tx in range(min(x1, x2), max(x1, x2) + 1):
+                    tiles[y1, tx] = TILE_FLOOR
+                for ty in range(min(y1, y2), max(y1, y2) + 1):
+                    tiles[ty, x2] = TILE_FLOOR
+            else:
+                for ty in range(min(y1, y2), max(y1, y2) + 1):
+                    tiles[ty, x1] = TILE_FLOOR
+                for tx in range(min(x1, x2), max(x1, x2) + 1):
+                    tiles[y2, tx] = TILE_FLOOR
+        rooms.append((x, y, w, h))
+    return tiles
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(i)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    for width, height in SIZES:
+        # More rooms on bigger maps so corridors and overlap tests scale too
+        attempts = 20 * (width * height) // (60 * 45)
+        old = timed(lambda i: old_generate(width, height, attempts), 20)
+        new = timed(lambda i: Dungeon(width, height, seed=i, room_attempts=attempts), 20)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            Dungeon(width, height, seed=0, room_attempts=attempts, cache_dir=cache_dir)
+            cached = timed(lambda i: Dungeon(width, height, seed=0, room_attempts=attempts, cache_dir=cache_dir), 20)
+        print(f"{width}x{height} ({attempts} attempts): old {old:7.3f} ms   new {new:7.3f} ms   cached {cached:7.3f} ms")
+
+    width, height = SIZES[-1]
+    start = time.perf_counter()
+    generate_batch(range(BATCH), width, height, room_attempts=1000, workers=1)
+    serial = time.perf_counter() - start
+    start = time.perf_counter()
+    generate_batch(range(BATCH), width, height, room_attempts=1000)
+    pooled = time.perf_counter() - start
+    print(f"batch of {BATCH} {width}x{height}: serial {serial:6.3f} s   pool ({os.cpu_count()} cpus) {pooled:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench_lighting.py
+# Compares the old per-frame full-screen SRCALPHA light mask with app.lighting.Lighting,
+# blended over the whole screen and (as Game.draw_scene does) only over the torch rect.
+# Run from the repo root: python -m benchmarks.bench_lighting
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from app.dungeon import Dungeon
+from app.fov import FieldOfView
+from app.lighting import Lighting
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
+TILE_SIZE = 24
+LIGHT_RADIUS = 7
+FRAMES = 300
+
+
+def old_light_mask(screen, center, radius_px):
+    light_mask = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    light_mask.fill((0, 0, 0, 200))
+    pygame.draw.circle(light_mask, (0, 0, 0, 0), center, int(radius_px))
+    screen.blit(light_mask, (0, 0))
+
+
+def run(label, draw):
+    times = []
+    for i in range(FRAMES):
+        radius = LIGHT_RADIUS + np.sin(i * 0.1)
+        start = time.perf_counter()
+        draw(radius)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000
+    print(f"{label:<28} mean {times.mean():6.3f} ms   p95 {np.percentile(times, 95):6.3f} ms")
+    return times.mean()
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+
+    dungeon = Dungeon(60, 45)
+    player = dungeon.center(dungeon.rooms[0])
+    fov = FieldOfView(dungeon)
+    lighting = Lighting((SCREEN_WIDTH, SCREEN_HEIGHT), TILE_SIZE)
+
+    def new_with_fov(radius):
+        result = fov.compute(player, int(np.ceil(radius)))
+        origin = (center[0] - (player[0] - result.x0) * TILE_SIZE - TILE_SIZE // 2,
+                  center[1] - (player[1] - result.y0) * TILE_SIZE - TILE_SIZE // 2)
+        lighting.draw(screen, center, radius * TILE_SIZE, result, origin)
+
+    def new_torch_rect(radius):
+        # Outside the torch rect the game blits pre-darkened tiles instead of blending
+        rect = lighting.update(center, radius * TILE_SIZE)
+        screen.set_clip(rect)
+        screen.blit(lighting.buffer, (0, 0))
+        screen.set_clip(None)
+
+    old = run("full-screen SRCALPHA mask", lambda r: old_light_mask(screen, center, r * TILE_SIZE))
+    new = run("Lighting (stamp only)", lambda r: lighting.draw(screen, center, r * TILE_SIZE))
+    new_fov = run("Lighting (stamp + FOV)", new_with_fov)
+    rect_only = run("Lighting (torch rect blend)", new_torch_rect)
+    run("Lighting (torch off)", lambda r: lighting.draw(screen))
+    print(f"speedup: {old / new:.1f}x stamp only, {old / new_fov:.1f}x with FOV, "
+          f"{old / rect_only:.1f}x blending the torch rect only, {len(lighting.stamps)} cached stamps")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
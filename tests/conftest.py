@@ -0,0 +1,24 @@
+# conftest.py
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def repo_root(monkeypatch):
+    # Game loads its assets by paths relative to the repo root
+    monkeypatch.chdir(ROOT)
+    return ROOT
+
+
+@pytest.fixture
+def screen(repo_root):
+    import pygame
+    from app.game import SCREEN_WIDTH, SCREEN_HEIGHT
+    from app.headless import use_dummy_video_driver
+    use_dummy_video_driver()
+    pygame.init()
+    yield pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.quit()
@@ -0,0 +1,28 @@
+# test_replay.py
+import json
+
+import numpy as np
+
+from app.main import parse_args, run
+from app.snapshot import load_snapshot
+
+
+def test_replay_reproduces_run(repo_root, tmp_path):
+    log_path = str(tmp_path / "run.json")
+    recorded, replayed = str(tmp_path / "recorded.npz"), str(tmp_path / "replayed.npz")
+    # Two steps per frame, so events must be matched to steps rather than frames
+    run(parse_args(["--headless", "--uncapped", "--seed", "11", "--frames", "200", "--steps-per-frame", "2",
+                    "--replay-out", log_path, "--save", recorded]))
+    with open(log_path) as f:
+        log = json.load(f)
+    assert log["steps"] == 400
+    assert any("keys" in event for event in log["events"])
+
+    run(parse_args(["--replay", log_path, "--save", replayed]))
+
+    a, b = load_snapshot(recorded), load_snapshot(replayed)
+    assert a["meta"] == b["meta"]
+    assert a.keys() == b.keys()
+    for name in a:
+        if name != "meta":
+            np.testing.assert_array_equal(a[name], b[name], err_msg=name)
@@ -0,0 +1,84 @@
+# test_snapshot.py
+import numpy as np
+import pytest
+
+from app.entities import COLUMNS
+from app.game import Game
+from app.headless import ScriptedInput, random_script
+from app.replay import step
+from app.snapshot import load_snapshot, save_snapshot
+
+SEED = 7
+STEPS = 300
+MORE_STEPS = 150
+
+
+def game_state(game):
+    # Everything a snapshot promises to bring back, as plain comparable values
+    w, h = game.map_width, game.map_height
+    state = {
+        "step_count": game.step_count,
+        "time": game.time,
+        "player_tile": game.player_tile.tolist(),
+        "target_tile": game.target_tile.tolist(),
+        "player_status": dict(game.player_status),
+        "tool": (game.tool_toggle_state, game.tool_selected, game.last_toggle_time, game.prev_hand_piece),
+        "inventory": list(game.inventory.item_keys),
+        "next_id": game.entities.next_id,
+        "rooms": [tuple(room) for room in game.dungeon.rooms],
+        "tiles": np.asarray(game.dungeon.tiles[0:h, 0:w]),
+        "fog": np.asarray(game.fog.explored[0:h, 0:w]),
+    }
+    columns = game.entities.columns()
+    n = game.entities.count
+    live = columns["alive"][:n]
+    for name in COLUMNS:
+        state["entity_" + name] = columns[name][:n][live]
+    return state
+
+
+def assert_same_state(a, b):
+    assert a.keys() == b.keys()
+    for name in a:
+        if isinstance(a[name], np.ndarray):
+            np.testing.assert_array_equal(a[name], b[name], err_msg=name)
+        else:
+            assert a[name] == b[name], name
+
+
+def run_steps(game, hand_input, steps):
+    for _ in range(steps):
+        step(game, hand_input)
+
+
+@pytest.mark.parametrize("map_size", [(60, 45), (320, 320)], ids=["dense", "chunked"])
+def test_save_load_restores_state(screen, tmp_path, map_size):
+    np.random.seed(SEED)
+    script = random_script(STEPS + MORE_STEPS, SEED)
+    hand_input = ScriptedInput(script)
+    game = Game(screen, hand_input, map_size=map_size)
+    run_steps(game, hand_input, STEPS)
+
+    path = str(tmp_path / "run.npz")
+    save_snapshot(game, path)
+    rng_state = np.random.get_state()
+    saved = game_state(game)
+
+    np.random.seed(SEED + 1)  # a fresh process would not have the saved run's np.random state
+
+    # Hand state is live input, not part of a snapshot: bring the script's up to the save point
+    resumed_input = ScriptedInput(script)
+    for i in range(STEPS):
+        resumed_input.advance(i)
+    resumed = Game(screen, resumed_input, snapshot=load_snapshot(path))
+    assert_same_state(saved, game_state(resumed))
+    resumed_rng = np.random.get_state()
+    assert resumed_rng[0] == rng_state[0] and resumed_rng[2:] == rng_state[2:]
+    np.testing.assert_array_equal(resumed_rng[1], rng_state[1])
+
+    # Both runs must also stay in step afterwards (they share np.random, so one at a time)
+    run_steps(resumed, resumed_input, MORE_STEPS)
+    after_resume = game_state(resumed)
+    np.random.set_state(rng_state)
+    run_steps(game, hand_input, MORE_STEPS)
+    assert_same_state(game_state(game), after_resume)
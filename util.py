@@ -1,109 +1,179 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import cv2 as cv
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Constants ---
 COLOR_FLOOR = (150, 150, 150)
 ASSETS_DIR = "assets"
 OUTPUT_DIR = "assets"
 TARGET_SIZE = (24, 24)
+BG_THRESHOLD = 35
+MANIFEST_NAME = ".asset_manifest.json"
+PIPELINE_VERSION = 2  # part of every manifest key; bump when the output changes
+SUPPORTED_EXTS = (".png", ".jpg", ".jpeg")
 
 # --- Utility Functions ---
 def print_array_details(A):
     print(f"{A.shape=}, {A.dtype=}, {np.amin(A)=}, {np.amax(A)=}")
 
-def get_distance(img, bg):
-    diff = img - bg
-    return np.sqrt(np.sum(diff**2, axis=2))
-
+def read_image(path):
+    # uint8 BGR or BGRA straight from OpenCV; grayscale and 16-bit sources are normalized
+    img = cv.imread(path, cv.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError(f"cannot decode {path}")
+    if img.dtype == np.uint16:
+        img = (img >> 8).astype(np.uint8)
+    if img.ndim == 2:
+        img = cv.cvtColor(img, cv.COLOR_GRAY2BGR)
+    return img
 
 def resize_and_save(image_path, output_path, new_size=(24, 24)):
-    img = plt.imread(image_path)
+    img = read_image(image_path)
     print(f"Array Before Resize: {image_path}")
     print_array_details(img)
 
     img_resized = cv.resize(img, new_size, interpolation=cv.INTER_AREA)
-
-    # Convert to uint8
-    if img_resized.dtype != np.uint8:
-        img_resized = (img_resized * 255).astype(np.uint8)
-        print(f"Your new image is ready for use:")
-        print_array_details(img_resized)
+    print(f"Your new image is ready for use:")
+    print_array_details(img_resized)
 
     # Save using OpenCV
-    cv.imwrite(output_path, cv.cvtColor(img_resized, cv.COLOR_RGB2BGR))
-
-def get_corners(img):
-    my, mx, _ = img.shape
-    mx -= 1
-    my -= 1
-    return np.array([[0, 0, 1], [mx, 0, 1], [mx, my, 1], [0, my, 1], [0, 0, 1]]).T
-
-def _create_mask(img, threshold=35):
-    corners = get_corners(img)
-    corner_pixels = []
-    for x, y, _ in corners.T[:4]:
-        corner_pixels.append(img[y, x])
-    corner_pixels = np.array(corner_pixels)
-    bg_color = np.mean(corner_pixels, axis=0)
-    dist = get_distance(img, bg_color)
-    return dist > threshold
-
-def remove_background(img, tile_color=(150, 150, 150)):
-    mask = _create_mask(img)
-    mask_3c = np.repeat(mask[:, :, np.newaxis], 3, axis=2)
-    tile_color_arr = np.array(tile_color, dtype=np.uint8)
-    return (img * mask_3c + tile_color_arr * (~mask_3c)).astype(np.uint8)
-
-def process_all_assets():
-    supported_exts = (".png", ".jpg", ".jpeg")
-    skipped_files = []
-
-    for filename in os.listdir(ASSETS_DIR):
-        if not filename.lower().endswith(supported_exts):
+    cv.imwrite(output_path, img_resized)
+
+def _create_mask(img, threshold=BG_THRESHOLD, out=None):
+    # Foreground mask for one (H, W, C) image or a (N, H, W, C) batch: pixels farther than
+    # `threshold` from the mean of the four corner pixels. Squared int32 distance is built
+    # up one channel at a time, so no float or 3-channel temporaries are allocated.
+    batch = img if img.ndim == 4 else img[np.newaxis]
+    corners = batch[:, [0, 0, -1, -1], [0, -1, -1, 0], :3].astype(np.int32)
+    bg_color = (corners.sum(axis=1) + 2) // 4  # (N, 3), rounded
+
+    dist_sq = np.zeros(batch.shape[:3], dtype=np.int32)
+    diff = np.empty(batch.shape[:3], dtype=np.int32)
+    for c in range(3):
+        np.subtract(batch[..., c], bg_color[:, c, np.newaxis, np.newaxis], out=diff, dtype=np.int32)
+        np.multiply(diff, diff, out=diff)
+        dist_sq += diff
+    mask = np.greater(dist_sq, threshold * threshold, out=out)
+    return mask if img.ndim == 4 else mask[0]
+
+def remove_background(img, threshold=BG_THRESHOLD, out=None):
+    # Returns BGRA with the background made transparent, for one image or a 4D batch.
+    # A 4-channel uint8 input is updated in place (keeping what it already had transparent);
+    # otherwise `out` (or a new array) is filled.
+    mask = _create_mask(img, threshold)
+    if out is None:
+        out = img if img.shape[-1] == 4 and img.dtype == np.uint8 else np.empty(img.shape[:-1] + (4,), dtype=np.uint8)
+    if out is not img:
+        out[..., :3] = img[..., :3]
+        if img.shape[-1] == 4:
+            out[..., 3] = img[..., 3]
+        else:
+            out[..., 3] = 255
+    out[..., 3] *= mask
+    out[..., :3] *= mask[..., np.newaxis]  # transparent pixels are black, so scaling can't bleed color
+    return out
+
+def resize_batch(images, size=TARGET_SIZE):
+    # Resizes a (N, H, W, C) batch into one preallocated (N, h, w, C) array.
+    # INTER_AREA only takes up to 4 channels, so images can't be stacked along the
+    # channel axis for a single call; each resize writes straight into its output slot.
+    n, h, w, c = images.shape
+    out = np.empty((n, size[1], size[0], c), dtype=images.dtype)
+    for i in range(n):
+        cv.resize(images[i], size, dst=out[i], interpolation=cv.INTER_AREA)
+    return out
+
+def process_batch(images, size=TARGET_SIZE, threshold=BG_THRESHOLD):
+    # (N, H, W, C) uint8 batch -> (resized BGR batch, BGRA batch with background removed)
+    resized = resize_batch(np.asarray(images, dtype=np.uint8), size)
+    ready = remove_background(resized, threshold, out=np.empty(resized.shape[:-1] + (4,), dtype=np.uint8))
+    return resized[..., :3], ready
+
+def output_paths(filename, output_dir=OUTPUT_DIR):
+    base_name = filename.rsplit(".", 1)[0]
+    return os.path.join(output_dir, base_name + "_24.png"), os.path.join(output_dir, base_name + "_ready.png")
+
+def process_asset(job):
+    # Worker: one source image -> _24 (resized) and _ready (background removed) PNGs
+    input_path, output_dir, size, threshold = job
+    filename = os.path.basename(input_path)
+    resized_path, ready_path = output_paths(filename, output_dir)
+    try:
+        img = read_image(input_path)
+        resized, ready = process_batch(img[np.newaxis], size, threshold)
+        cv.imwrite(resized_path, resized[0])
+        cv.imwrite(ready_path, ready[0])
+        return filename, None
+    except Exception as e:
+        return filename, str(e)
+
+def content_key(path, size=TARGET_SIZE, threshold=BG_THRESHOLD):
+    # Hash of the source bytes plus everything that changes the output
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(repr((PIPELINE_VERSION, tuple(size), threshold)).encode())
+    return digest.hexdigest()
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def process_all_assets(assets_dir=ASSETS_DIR, output_dir=OUTPUT_DIR, size=TARGET_SIZE, threshold=BG_THRESHOLD,
+                       workers=None, force=False):
+    # Processes every changed source image over a process pool. A manifest of content
+    # hashes in output_dir lets unchanged sources (with outputs still present) be skipped.
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {} if force else load_manifest(manifest_path)
+
+    jobs, keys = [], {}
+    for filename in sorted(os.listdir(assets_dir)):
+        if not filename.lower().endswith(SUPPORTED_EXTS):
             continue
         if "_24." in filename or "_ready." in filename:
             continue  # Skip already processed files
 
-        input_path = os.path.join(ASSETS_DIR, filename)
-        base_name = filename.rsplit(".", 1)[0]
-        resized_filename = base_name + "_24.png"
-        ready_filename = base_name + "_ready.png"
-        resized_path = os.path.join(OUTPUT_DIR, resized_filename)
-        ready_path = os.path.join(OUTPUT_DIR, ready_filename)
-
-        try:
-            img = plt.imread(input_path)
-
-            # Resize
-            img_resized = cv.resize(img, TARGET_SIZE, interpolation=cv.INTER_AREA)
-
-            # Convert to uint8 if needed
-            if img_resized.dtype != np.uint8:
-                img_resized = (img_resized * 255).astype(np.uint8)
-
-            # Save resized version
-            cv.imwrite(resized_path, cv.cvtColor(img_resized, cv.COLOR_RGB2BGR))
-
-            # Remove background
-            if img_resized.shape[2] == 4:
-                img_resized = img_resized[:, :, :3]  # drop alpha
-
-            cleaned = remove_background(img_resized, tile_color=COLOR_FLOOR)
+        input_path = os.path.join(assets_dir, filename)
+        keys[filename] = content_key(input_path, size, threshold)
+        if manifest.get(filename) == keys[filename] and all(map(os.path.exists, output_paths(filename, output_dir))):
+            continue
+        jobs.append((input_path, output_dir, tuple(size), threshold))
 
-            # Save cleaned version
-            cv.imwrite(ready_path, cv.cvtColor(cleaned, cv.COLOR_RGB2BGR))
-            print(f"Processed: {filename} -> {resized_filename}, {ready_filename}")
+    print(f"{len(jobs)} of {len(keys)} assets changed")
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(process_asset, jobs, chunksize=max(1, len(jobs) // (8 * (workers or os.cpu_count() or 1)))))
+    else:
+        results = [process_asset(job) for job in jobs]
 
-        except Exception as e:
-            print(f"Skipped {filename}: {e}")
+    skipped_files = []
+    for filename, error in results:
+        if error is None:
+            manifest[filename] = keys[filename]
+            print(f"Processed: {filename}")
+        else:
+            print(f"Skipped {filename}: {error}")
+            manifest.pop(filename, None)
             skipped_files.append(filename)
 
+    # Forget sources that no longer exist
+    manifest = {name: key for name, key in manifest.items() if name in keys}
+    os.makedirs(output_dir, exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
     if skipped_files:
         print("\nSkipped files:")
         for name in skipped_files:
             print(f"- {name}")
+    return results
 
 # Run when the script is executed
 if __name__ == "__main__":